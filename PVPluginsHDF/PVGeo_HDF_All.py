@@ -18,6 +18,9 @@ from PVGeo.grids import *
 
 #### GLOBAL VARIABLES ####
 MENU_CAT = 'PVGeo-HDF'
+# Only offer the compression codecs that are installed
+COMPRESSION_LABELS = [dict(none='None', auto='Auto', lz4='LZ4').get(m, m.title())
+                      for m in CMAQReader.get_compression_modes()]
 
 
 
@@ -48,11 +51,114 @@ class PVGeoHDFSVCParcelReader(SVCParcelReader):
         """This is critical for registering the timesteps"""
         return SVCParcelReader.get_time_step_values(self)
 
+    @smproperty.dataarrayselection(name="PointArrays")
+    def get_data_array_selection(self):
+        return SVCParcelReader.get_data_array_selection(self)
+
     # This is an example of how to create a GUI input field
     @smproperty.stringvector(name='DataName', default_values='Data')
     def set_data_name(self, name):
         SVCParcelReader.set_data_name(self, name)
 
+    @smproperty.xml(_helpers.get_property_xml(name='Lazy', command='set_lazy', default_values=False, panel_visibility='advanced', help='Only read the file metadata up front and read each timestep from disk when it is requested.'))
+    def set_lazy(self, flag):
+        SVCParcelReader.set_lazy(self, flag)
+
+    @smproperty.stringvector(name="DerivedVariables", default_values="")
+    def set_derived_variables(self, text):
+        """Arrays derived from the file variables as ``name = expression``
+        separated by semicolons, e.g. ``NOX = NO + NO2``"""
+        SVCParcelReader.set_derived_variables(self, text)
+
+    @smproperty.xml(_helpers.get_drop_down_xml(name='Compression', command='set_compression', labels=COMPRESSION_LABELS, help='Keep every timestep of the arrays compressed in memory with a fast codec and decompress the requested timestep. Does not apply when lazy.'))
+    def set_compression(self, codec):
+        SVCParcelReader.set_compression(self, codec)
+
+    @smproperty.intvector(name="DecompressThreads", default_values=4, panel_visibility="advanced")
+    def set_decompress_threads(self, n):
+        """Number of threads to decompress the arrays of a timestep on"""
+        SVCParcelReader.set_decompress_threads(self, n)
+
+    @smproperty.intvector(name="TimeStride", default_values=1, panel_visibility="advanced")
+    def set_time_stride(self, stride):
+        """Only expose and read every k-th timestep"""
+        SVCParcelReader.set_time_stride(self, stride)
+
+    @smproperty.xml(_helpers.get_property_xml(name='Follow', command='set_follow', default_values=False, help='Follow a file that is still being written: the last file is checked whenever the time changes and only the timesteps appended to it are read. Press Refresh to check without changing the time.'))
+    def set_follow(self, flag):
+        SVCParcelReader.set_follow(self, flag)
+
+    @smproperty.doublevector(name="FollowInterval", default_values=1.0, panel_visibility="advanced")
+    def set_follow_interval(self, seconds):
+        """Least number of seconds between checks for new timesteps"""
+        SVCParcelReader.set_follow_interval(self, seconds)
+
+    @smproperty.xml("""<Property name="Refresh" command="check_for_new_time_steps" panel_widget="command_button">
+        <Documentation>Check the last file for new timesteps now.</Documentation>
+    </Property>""")
+    def check_for_new_time_steps(self):
+        return SVCParcelReader.check_for_new_time_steps(self)
+
+    @smproperty.xml(_helpers.get_drop_down_xml(name='LODMode', command='set_lod_mode', labels=['None', 'Stride', 'Random'], help='Only read and output a subset of the parcels: every k-th parcel or a stable random subset. The same parcels are kept every timestep.'))
+    def set_lod_mode(self, mode):
+        SVCParcelReader.set_lod_mode(self, mode)
+
+    @smproperty.intvector(name="LODTarget", default_values=100000, panel_visibility="advanced")
+    def set_lod_target(self, count):
+        """Number of parcels to output when using a level of detail"""
+        SVCParcelReader.set_lod_target(self, count)
+
+    @smproperty.xml(_helpers.get_property_xml(name='Trajectories', command='set_trajectories', default_values=False, help='Output the path of each parcel over a window of timesteps ending at the current timestep as a polyline.'))
+    def set_trajectories(self, flag):
+        SVCParcelReader.set_trajectories(self, flag)
+
+    @smproperty.intvector(name="TrajectoryLength", default_values=0)
+    def set_trajectory_length(self, n):
+        """Number of timesteps in the trajectory window (0 for all up to now)"""
+        SVCParcelReader.set_trajectory_length(self, n)
+
+    @smproperty.intvector(name="CacheSize", default_values=512, panel_visibility="advanced")
+    def set_cache_size(self, size):
+        """Byte budget in megabytes of the cache of lazily read timesteps"""
+        SVCParcelReader.set_cache_size(self, size)
+
+    @smproperty.intvector(name="Prefetch", default_values=2, panel_visibility="advanced")
+    def set_prefetch(self, n):
+        """Number of timesteps to read ahead in the background"""
+        SVCParcelReader.set_prefetch(self, n)
+
+    @smproperty.intvector(name="MaxOpenFiles", default_values=16, panel_visibility="advanced")
+    def set_max_open_files(self, n):
+        """Most files of a time series to keep open at once"""
+        SVCParcelReader.set_max_open_files(self, n)
+
+    @smproperty.intvector(name="Workers", default_values=0, panel_visibility="advanced")
+    def set_workers(self, n):
+        """Number of worker processes to read in (0 reads in the pipeline)"""
+        SVCParcelReader.set_workers(self, n)
+
+    @smproperty.xml(_helpers.get_property_xml(name='Parallel I/O', command='set_parallel_io', default_values=False, panel_visibility='advanced', help='Open the file for parallel netCDF4/HDF5 I/O when running on more than one MPI rank. Requires mpi4py and a parallel build of netCDF4.'))
+    def set_parallel_io(self, flag):
+        SVCParcelReader.set_parallel_io(self, flag)
+
+    @smproperty.xml(_helpers.get_property_xml(name='Memory Map', command='set_use_memmap', default_values=True, panel_visibility='advanced', help='Slice netCDF-3 variables and contiguous, uncompressed netCDF4 variables from a memory map of the file.'))
+    def set_use_memmap(self, flag):
+        SVCParcelReader.set_use_memmap(self, flag)
+
+    @smproperty.xml(_helpers.get_property_xml(name='Profile', command='set_profile', default_values=False, panel_visibility='advanced', help='Record the time, bytes read, and bytes allocated of each stage of reading to the pvgeohdf.profile logger.'))
+    def set_profile(self, flag):
+        SVCParcelReader.set_profile(self, flag)
+
+    @smproperty.stringvector(name="CacheDirectory", default_values="", panel_visibility="advanced")
+    def set_cache_dir(self, cache_dir):
+        """Directory of a persistent cache of the arrays read (empty to disable)"""
+        SVCParcelReader.set_cache_dir(self, cache_dir)
+
+    @smproperty.intvector(name="DiskCacheSize", default_values=10240, panel_visibility="advanced")
+    def set_disk_cache_size(self, size):
+        """Size cap in megabytes of the persistent cache"""
+        SVCParcelReader.set_disk_cache_size(self, size)
+
 
 ###############################################################################
 
@@ -81,6 +187,10 @@ class PVGeoCMAQReader(CMAQReader):
         """This is critical for registering the timesteps"""
         return CMAQReader.get_time_step_values(self)
 
+    @smproperty.dataarrayselection(name="CellArrays")
+    def get_data_array_selection(self):
+        return CMAQReader.get_data_array_selection(self)
+
     @smproperty.doublevector(name="Spacing", default_values=[1.0, 1.0, 1.0],)
     def set_spacing(self, dx, dy, dz):
         CMAQReader.set_spacing(self, dx, dy, dz)
@@ -88,3 +198,197 @@ class PVGeoCMAQReader(CMAQReader):
     @smproperty.doublevector(name="Origin", default_values=[0.0, 0.0, 0.0],)
     def set_origin(self, ox, oy, oz):
         CMAQReader.set_origin(self, ox, oy, oz)
+
+    @smproperty.xml(_helpers.get_property_xml(name='Lazy', command='set_lazy', default_values=False, panel_visibility='advanced', help='Only read the file metadata up front and read each timestep from disk when it is requested.'))
+    def set_lazy(self, flag):
+        CMAQReader.set_lazy(self, flag)
+
+    @smproperty.stringvector(name="DerivedVariables", default_values="")
+    def set_derived_variables(self, text):
+        """Arrays derived from the file variables as ``name = expression``
+        separated by semicolons, e.g. ``NOX = NO + NO2``"""
+        CMAQReader.set_derived_variables(self, text)
+
+    @smproperty.xml(_helpers.get_drop_down_xml(name='Compression', command='set_compression', labels=COMPRESSION_LABELS, help='Keep every timestep of the arrays compressed in memory with a fast codec and decompress the requested timestep. Does not apply when lazy.'))
+    def set_compression(self, codec):
+        CMAQReader.set_compression(self, codec)
+
+    @smproperty.intvector(name="DecompressThreads", default_values=4, panel_visibility="advanced")
+    def set_decompress_threads(self, n):
+        """Number of threads to decompress the arrays of a timestep on"""
+        CMAQReader.set_decompress_threads(self, n)
+
+    @smproperty.intvector(name="TimeStride", default_values=1, panel_visibility="advanced")
+    def set_time_stride(self, stride):
+        """Only expose and read every k-th timestep"""
+        CMAQReader.set_time_stride(self, stride)
+
+    @smproperty.xml(_helpers.get_property_xml(name='Follow', command='set_follow', default_values=False, help='Follow a file that is still being written: the last file is checked whenever the time changes and only the timesteps appended to it are read. Press Refresh to check without changing the time.'))
+    def set_follow(self, flag):
+        CMAQReader.set_follow(self, flag)
+
+    @smproperty.doublevector(name="FollowInterval", default_values=1.0, panel_visibility="advanced")
+    def set_follow_interval(self, seconds):
+        """Least number of seconds between checks for new timesteps"""
+        CMAQReader.set_follow_interval(self, seconds)
+
+    @smproperty.xml("""<Property name="Refresh" command="check_for_new_time_steps" panel_widget="command_button">
+        <Documentation>Check the last file for new timesteps now.</Documentation>
+    </Property>""")
+    def check_for_new_time_steps(self):
+        return CMAQReader.check_for_new_time_steps(self)
+
+    @smproperty.intvector(name="CacheSize", default_values=512, panel_visibility="advanced")
+    def set_cache_size(self, size):
+        """Byte budget in megabytes of the cache of lazily read timesteps"""
+        CMAQReader.set_cache_size(self, size)
+
+    @smproperty.intvector(name="Prefetch", default_values=2, panel_visibility="advanced")
+    def set_prefetch(self, n):
+        """Number of timesteps to read ahead in the background"""
+        CMAQReader.set_prefetch(self, n)
+
+    @smproperty.intvector(name="MaxOpenFiles", default_values=16, panel_visibility="advanced")
+    def set_max_open_files(self, n):
+        """Most files of a time series to keep open at once"""
+        CMAQReader.set_max_open_files(self, n)
+
+    @smproperty.intvector(name="Workers", default_values=0, panel_visibility="advanced")
+    def set_workers(self, n):
+        """Number of worker processes to read in (0 reads in the pipeline)"""
+        CMAQReader.set_workers(self, n)
+
+    @smproperty.xml(_helpers.get_property_xml(name='Parallel I/O', command='set_parallel_io', default_values=False, panel_visibility='advanced', help='Open the file for parallel netCDF4/HDF5 I/O when running on more than one MPI rank. Requires mpi4py and a parallel build of netCDF4.'))
+    def set_parallel_io(self, flag):
+        CMAQReader.set_parallel_io(self, flag)
+
+    @smproperty.xml(_helpers.get_property_xml(name='Memory Map', command='set_use_memmap', default_values=True, panel_visibility='advanced', help='Slice netCDF-3 variables and contiguous, uncompressed netCDF4 variables from a memory map of the file.'))
+    def set_use_memmap(self, flag):
+        CMAQReader.set_use_memmap(self, flag)
+
+    @smproperty.xml(_helpers.get_property_xml(name='Profile', command='set_profile', default_values=False, panel_visibility='advanced', help='Record the time, bytes read, and bytes allocated of each stage of reading to the pvgeohdf.profile logger.'))
+    def set_profile(self, flag):
+        CMAQReader.set_profile(self, flag)
+
+    @smproperty.stringvector(name="CacheDirectory", default_values="", panel_visibility="advanced")
+    def set_cache_dir(self, cache_dir):
+        """Directory of a persistent cache of the arrays read (empty to disable)"""
+        CMAQReader.set_cache_dir(self, cache_dir)
+
+    @smproperty.intvector(name="DiskCacheSize", default_values=10240, panel_visibility="advanced")
+    def set_disk_cache_size(self, size):
+        """Size cap in megabytes of the persistent cache"""
+        CMAQReader.set_disk_cache_size(self, size)
+
+
+###############################################################################
+
+GRID_DESC = "Gridded Points Reader: Time varying CF-convention grid"
+
+@smproxy.reader(name="PVGeoGriddedPointsReader",
+                label="PVGeo: Gridded Points Reader",
+                extensions=GriddedPointsReader.extensions,
+                file_description=GRID_DESC)
+class PVGeoGriddedPointsReader(GriddedPointsReader):
+    def __init__(self):
+        GriddedPointsReader.__init__(self)
+
+    #### Seters and Geters ####
+
+    @smproperty.xml(_helpers.get_file_reader_xml(GriddedPointsReader.extensions, reader_description=GRID_DESC))
+    def add_file_name(self, fname):
+        GriddedPointsReader.add_file_name(self, fname)
+
+    # @smproperty.doublevector(name="TimeDelta", default_values=1.0, panel_visibility="advanced")
+    # def set_time_delta(self, dt):
+    #     GriddedPointsReader.set_time_delta(self, dt)
+
+    @smproperty.doublevector(name="TimestepValues", information_only="1", si_class="vtkSITimeStepsProperty")
+    def get_time_step_values(self):
+        """This is critical for registering the timesteps"""
+        return GriddedPointsReader.get_time_step_values(self)
+
+    @smproperty.dataarrayselection(name="PointArrays")
+    def get_data_array_selection(self):
+        return GriddedPointsReader.get_data_array_selection(self)
+
+    @smproperty.xml(_helpers.get_property_xml(name='Lazy', command='set_lazy', default_values=False, panel_visibility='advanced', help='Only read the file metadata up front and read each timestep from disk when it is requested.'))
+    def set_lazy(self, flag):
+        GriddedPointsReader.set_lazy(self, flag)
+
+    @smproperty.stringvector(name="DerivedVariables", default_values="")
+    def set_derived_variables(self, text):
+        """Arrays derived from the file variables as ``name = expression``
+        separated by semicolons, e.g. ``NOX = NO + NO2``"""
+        GriddedPointsReader.set_derived_variables(self, text)
+
+    @smproperty.xml(_helpers.get_drop_down_xml(name='Compression', command='set_compression', labels=COMPRESSION_LABELS, help='Keep every timestep of the arrays compressed in memory with a fast codec and decompress the requested timestep. Does not apply when lazy.'))
+    def set_compression(self, codec):
+        GriddedPointsReader.set_compression(self, codec)
+
+    @smproperty.intvector(name="DecompressThreads", default_values=4, panel_visibility="advanced")
+    def set_decompress_threads(self, n):
+        """Number of threads to decompress the arrays of a timestep on"""
+        GriddedPointsReader.set_decompress_threads(self, n)
+
+    @smproperty.intvector(name="TimeStride", default_values=1, panel_visibility="advanced")
+    def set_time_stride(self, stride):
+        """Only expose and read every k-th timestep"""
+        GriddedPointsReader.set_time_stride(self, stride)
+
+    @smproperty.xml(_helpers.get_property_xml(name='Follow', command='set_follow', default_values=False, help='Follow a file that is still being written: the last file is checked whenever the time changes and only the timesteps appended to it are read. Press Refresh to check without changing the time.'))
+    def set_follow(self, flag):
+        GriddedPointsReader.set_follow(self, flag)
+
+    @smproperty.doublevector(name="FollowInterval", default_values=1.0, panel_visibility="advanced")
+    def set_follow_interval(self, seconds):
+        """Least number of seconds between checks for new timesteps"""
+        GriddedPointsReader.set_follow_interval(self, seconds)
+
+    @smproperty.xml("""<Property name="Refresh" command="check_for_new_time_steps" panel_widget="command_button">
+        <Documentation>Check the last file for new timesteps now.</Documentation>
+    </Property>""")
+    def check_for_new_time_steps(self):
+        return GriddedPointsReader.check_for_new_time_steps(self)
+
+    @smproperty.intvector(name="CacheSize", default_values=512, panel_visibility="advanced")
+    def set_cache_size(self, size):
+        """Byte budget in megabytes of the cache of lazily read timesteps"""
+        GriddedPointsReader.set_cache_size(self, size)
+
+    @smproperty.intvector(name="Prefetch", default_values=2, panel_visibility="advanced")
+    def set_prefetch(self, n):
+        """Number of timesteps to read ahead in the background"""
+        GriddedPointsReader.set_prefetch(self, n)
+
+    @smproperty.intvector(name="MaxOpenFiles", default_values=16, panel_visibility="advanced")
+    def set_max_open_files(self, n):
+        """Most files of a time series to keep open at once"""
+        GriddedPointsReader.set_max_open_files(self, n)
+
+    @smproperty.intvector(name="Workers", default_values=0, panel_visibility="advanced")
+    def set_workers(self, n):
+        """Number of worker processes to read in (0 reads in the pipeline)"""
+        GriddedPointsReader.set_workers(self, n)
+
+    @smproperty.xml(_helpers.get_property_xml(name='Parallel I/O', command='set_parallel_io', default_values=False, panel_visibility='advanced', help='Open the file for parallel netCDF4/HDF5 I/O when running on more than one MPI rank. Requires mpi4py and a parallel build of netCDF4.'))
+    def set_parallel_io(self, flag):
+        GriddedPointsReader.set_parallel_io(self, flag)
+
+    @smproperty.xml(_helpers.get_property_xml(name='Memory Map', command='set_use_memmap', default_values=True, panel_visibility='advanced', help='Slice netCDF-3 variables and contiguous, uncompressed netCDF4 variables from a memory map of the file.'))
+    def set_use_memmap(self, flag):
+        GriddedPointsReader.set_use_memmap(self, flag)
+
+    @smproperty.xml(_helpers.get_property_xml(name='Profile', command='set_profile', default_values=False, panel_visibility='advanced', help='Record the time, bytes read, and bytes allocated of each stage of reading to the pvgeohdf.profile logger.'))
+    def set_profile(self, flag):
+        GriddedPointsReader.set_profile(self, flag)
+
+    @smproperty.stringvector(name="CacheDirectory", default_values="", panel_visibility="advanced")
+    def set_cache_dir(self, cache_dir):
+        """Directory of a persistent cache of the arrays read (empty to disable)"""
+        GriddedPointsReader.set_cache_dir(self, cache_dir)
+
+    @smproperty.intvector(name="DiskCacheSize", default_values=10240, panel_visibility="advanced")
+    def set_disk_cache_size(self, size):
+        """Size cap in megabytes of the persistent cache"""
+        GriddedPointsReader.set_disk_cache_size(self, size)
@@ -0,0 +1,157 @@
+"""Writers of synthetic files shaped like the ones the readers are made for so
+the benchmarks run against reproducible data. The values are smooth fields so
+that compression behaves like it does on real model output.
+
+The files can also be written from the command line, e.g.::
+
+    python benchmarks/generators.py svc parcels.nc --parcels 100000 --times 200 --complevel 4
+    python benchmarks/generators.py cmaq conc.nc --times 48 --grid 35,299,459 --chunks 1,1,299,459
+    python benchmarks/generators.py cmaq conc.nc --times 24 --start 24 --fixed
+"""
+
+__all__ = [
+    'write_svc',
+    'write_cmaq',
+]
+
+__displayname__ = 'Benchmark Data Generators'
+
+import argparse
+
+import numpy as np
+import netCDF4
+
+
+def _variable_kwargs(chunks, complevel, shuffle, fixed=False):
+    """Get the ``createVariable`` keyword arguments of a storage layout.
+    Uncompressed variables without chunks are contiguous when all of their
+    dimensions are ``fixed`` (not unlimited).
+    """
+    kwargs = dict()
+    if chunks is not None:
+        kwargs['chunksizes'] = tuple(int(c) for c in chunks)
+    elif fixed and complevel == 0:
+        kwargs['contiguous'] = True
+    if complevel > 0:
+        kwargs.update(zlib=True, complevel=complevel, shuffle=shuffle)
+    return kwargs
+
+
+def write_svc(filename, num_parcels=10000, num_times=100, extra_variables=('parcel_temp', 'parcel_qv'),
+              chunks=None, complevel=0, shuffle=True, seed=0):
+    """Write a synthetic SVC parcel file: ``parcel_x_pos``, ``parcel_y_pos``,
+    and ``parcel_z_pos`` along with a few attribute variables, all float32
+    and shaped ``(num, time)``. The parcels drift along smooth paths.
+
+    Args:
+        filename (str): the file to write
+        num_parcels (int): the number of parcels
+        num_times (int): the number of timesteps
+        extra_variables (tuple(str)): the names of the attribute variables
+        chunks (tuple(int)): the ``(num, time)`` chunk shape or ``None`` for
+            the default layout
+        complevel (int): the zlib compression level (0 for none)
+        shuffle (bool): use the byte shuffle filter when compressing
+        seed (int): the seed of the random starting positions
+    """
+    rng = np.random.RandomState(seed)
+    t = np.arange(num_times, dtype=np.float32)
+    kwargs = _variable_kwargs(chunks, complevel, shuffle, fixed=True)
+    with netCDF4.Dataset(filename, 'w') as dataset:
+        dataset.createDimension('num', num_parcels)
+        dataset.createDimension('time', num_times)
+        start = rng.uniform(0.0, 1000.0, size=(num_parcels, 3)).astype(np.float32)
+        speed = rng.uniform(-2.0, 2.0, size=(num_parcels, 3)).astype(np.float32)
+        names = ['parcel_x_pos', 'parcel_y_pos', 'parcel_z_pos'] + list(extra_variables)
+        for i, name in enumerate(names):
+            variable = dataset.createVariable(name, 'f4', ('num', 'time'), **kwargs)
+            # Write a block of parcels at a time to bound the memory used
+            for a in range(0, num_parcels, 8192):
+                b = min(num_parcels, a + 8192)
+                if i < 3:
+                    values = start[a:b, i, None] + speed[a:b, i, None] * t[None, :]
+                else:
+                    phase = np.arange(a, b, dtype=np.float32)[:, None] / 500.0
+                    values = 280.0 + 10.0 * np.sin(phase + t[None, :] / 25.0 + i)
+                variable[a:b, :] = values
+    return filename
+
+
+def write_cmaq(filename, num_times=24, grid=(10, 100, 120), species=('O3', 'NO', 'NO2', 'CO'),
+               chunks=None, complevel=0, shuffle=True, unlimited=True, start=0):
+    """Write a synthetic CMAQ/IOAPI concentration file: a ``TFLAG`` variable
+    of ``[YYYYDDD, HHMMSS]`` pairs with hourly timesteps and one float32
+    ``(TSTEP, LAY, ROW, COL)`` variable per species.
+
+    Args:
+        filename (str): the file to write
+        num_times (int): the number of timesteps
+        grid (tuple(int)): the ``(LAY, ROW, COL)`` shape of the grid
+        species (tuple(str)): the names of the species variables
+        chunks (tuple(int)): the ``(TSTEP, LAY, ROW, COL)`` chunk shape or
+            ``None`` for the default layout
+        complevel (int): the zlib compression level (0 for none)
+        shuffle (bool): use the byte shuffle filter when compressing
+        unlimited (bool): make ``TSTEP`` unlimited (as CMAQ does). Variables
+            along an unlimited dimension are always chunked so use ``False``
+            for contiguous variables.
+        start (int): the hours from 2016-001 00:00 to the first timestep so
+            the files of a series follow each other
+    """
+    nlay, nrow, ncol = grid
+    kwargs = _variable_kwargs(chunks, complevel, shuffle, fixed=not unlimited)
+    with netCDF4.Dataset(filename, 'w', format='NETCDF4') as dataset:
+        dataset.createDimension('TSTEP', None if unlimited else num_times)
+        dataset.createDimension('DATE-TIME', 2)
+        dataset.createDimension('LAY', nlay)
+        dataset.createDimension('VAR', len(species))
+        dataset.createDimension('ROW', nrow)
+        dataset.createDimension('COL', ncol)
+        tflag = dataset.createVariable('TFLAG', 'i4', ('TSTEP', 'VAR', 'DATE-TIME'))
+        hours = start + np.arange(num_times)
+        flags = np.empty((num_times, len(species), 2), dtype=np.int32)
+        flags[:, :, 0] = (2016001 + hours // 24)[:, None]
+        flags[:, :, 1] = (hours % 24 * 10000)[:, None]
+        tflag[:] = flags
+        z, y, x = np.meshgrid(np.linspace(0.0, 1.0, nlay), np.linspace(0.0, 4.0, nrow),
+                              np.linspace(0.0, 4.0, ncol), indexing='ij')
+        for i, name in enumerate(species):
+            variable = dataset.createVariable(name, 'f4', ('TSTEP', 'LAY', 'ROW', 'COL'), **kwargs)
+            for ti in range(num_times):
+                field = 1.0 + np.sin(x + (start + ti) / 6.0 + i) * np.cos(y) * np.exp(-z)
+                variable[ti] = field.astype(np.float32)
+    return filename
+
+
+def _parse_shape(text):
+    """Parse a comma separated shape such as ``1,299,459``"""
+    if text is None:
+        return None
+    return tuple(int(v) for v in text.split(','))
+
+
+def main(argv=None):
+    """Write a synthetic file from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('kind', choices=('svc', 'cmaq'))
+    parser.add_argument('filename')
+    parser.add_argument('--times', type=int, default=None, help='the number of timesteps')
+    parser.add_argument('--parcels', type=int, default=10000, help='the number of SVC parcels')
+    parser.add_argument('--grid', default='10,100,120', help='the LAY,ROW,COL shape of the CMAQ grid')
+    parser.add_argument('--chunks', default=None, help='the comma separated chunk shape')
+    parser.add_argument('--complevel', type=int, default=0, help='the zlib compression level')
+    parser.add_argument('--no-shuffle', action='store_true', help='turn off the byte shuffle filter')
+    parser.add_argument('--fixed', action='store_true', help='make the CMAQ TSTEP dimension fixed length')
+    parser.add_argument('--start', type=int, default=0, help='the hours from 2016-001 to the first CMAQ timestep')
+    args = parser.parse_args(argv)
+    kwargs = dict(chunks=_parse_shape(args.chunks), complevel=args.complevel, shuffle=not args.no_shuffle)
+    if args.kind == 'svc':
+        write_svc(args.filename, num_parcels=args.parcels, num_times=args.times or 100, **kwargs)
+    else:
+        write_cmaq(args.filename, num_times=args.times or 24, grid=_parse_shape(args.grid),
+                   unlimited=not args.fixed, start=args.start, **kwargs)
+    return 0
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Benchmarks of ``SVCParcelReader`` and ``CMAQReader`` on synthetic files
+(see ``generators.py``) for use with `asv`_. Each reader is timed opening a
+file (the metadata phase) and producing its first frame, the mean latency of
+the frames that follow is tracked, and so is the peak RSS of reading a run.
+Every benchmark runs against contiguous, chunked, and compressed layouts of
+the same data, read both in full and lazily.
+
+Set ``PVGEOHDF_BENCH_SCALE`` to scale the number of parcels and grid cells
+(e.g. ``10`` for files closer to production sizes).
+
+.. _asv: https://asv.readthedocs.io
+"""
+
+__displayname__ = 'Reader Benchmarks'
+
+import os
+import timeit
+
+from pvgeohdf import CMAQReader, SVCParcelReader
+
+from .generators import write_cmaq, write_svc
+
+
+SCALE = float(os.environ.get('PVGEOHDF_BENCH_SCALE', 1.0))
+
+# The number of frames the frame latency is averaged over
+FRAMES = 10
+
+# The storage layouts each benchmark runs against
+LAYOUTS = ('contiguous', 'chunked', 'compressed')
+
+SVC_PARCELS = max(1, int(20000 * SCALE))
+SVC_TIMES = 100
+SVC_CHUNKS = (min(SVC_PARCELS, 4096), 16)
+
+CMAQ_TIMES = 24
+CMAQ_GRID = (10, max(1, int(100 * SCALE**0.5)), max(1, int(120 * SCALE**0.5)))
+CMAQ_CHUNKS = (1,) + CMAQ_GRID
+
+
+def _layout_kwargs(layout, chunks):
+    """Get the generator keyword arguments of a storage layout"""
+    if layout == 'chunked':
+        return dict(chunks=chunks)
+    if layout == 'compressed':
+        return dict(chunks=chunks, complevel=4, shuffle=True)
+    return dict()
+
+
+class _ReaderSuite(object):
+    """The benchmarks shared by the readers. Subclasses set ``reader_class``
+    and write their files in ``setup_cache``.
+    """
+    reader_class = None
+    params = (LAYOUTS, (False, True))
+    param_names = ('layout', 'lazy')
+    # A fresh reader is set up for every sample
+    number = 1
+    repeat = 5
+    timeout = 600
+
+    def _open(self, filenames, layout, lazy):
+        """Make a reader of the files of a layout and parse their metadata"""
+        # Turn off prefetching so each frame is timed on its own read
+        reader = self.reader_class(lazy=lazy, prefetch=0)
+        reader.AddFileName(filenames[layout])
+        reader.UpdateInformation()
+        return reader
+
+    def setup(self, filenames, layout, lazy):
+        self.reader = self._open(filenames, layout, lazy)
+        self.times = self.reader.get_time_step_values()
+
+    def time_open(self, filenames, layout, lazy):
+        """The metadata phase: no variable data should be read"""
+        self._open(filenames, layout, lazy)
+
+    def time_first_frame(self, filenames, layout, lazy):
+        """The first frame, including reading whole variables when not lazy"""
+        self.reader.UpdateTimeStep(self.times[0])
+
+    def track_frame_latency(self, filenames, layout, lazy):
+        """The mean latency of the frames after the first one, i.e. of
+        scrubbing in time once the reader is warm
+        """
+        self.reader.UpdateTimeStep(self.times[0])
+        frames = self.times[1:FRAMES + 1]
+        start = timeit.default_timer()
+        for t in frames:
+            self.reader.UpdateTimeStep(t)
+        return (timeit.default_timer() - start) / max(1, len(frames))
+    track_frame_latency.unit = 'seconds'
+
+    def peakmem_every_frame(self, filenames, layout, lazy):
+        """The peak RSS of opening the file and producing every frame"""
+        reader = self._open(filenames, layout, lazy)
+        for t in reader.get_time_step_values():
+            reader.UpdateTimeStep(t)
+
+
+class SVCParcelReaderSuite(_ReaderSuite):
+    """Benchmarks of ``SVCParcelReader``"""
+    reader_class = SVCParcelReader
+
+    def setup_cache(self):
+        filenames = dict()
+        for layout in LAYOUTS:
+            filenames[layout] = 'svc_%s.nc' % layout
+            write_svc(filenames[layout], num_parcels=SVC_PARCELS, num_times=SVC_TIMES,
+                      **_layout_kwargs(layout, SVC_CHUNKS))
+        return filenames
+
+
+class CMAQReaderSuite(_ReaderSuite):
+    """Benchmarks of ``CMAQReader``"""
+    reader_class = CMAQReader
+
+    def setup_cache(self):
+        filenames = dict()
+        for layout in LAYOUTS:
+            filenames[layout] = 'cmaq_%s.nc' % layout
+            # Variables along the unlimited TSTEP are always chunked
+            write_cmaq(filenames[layout], num_times=CMAQ_TIMES, grid=CMAQ_GRID,
+                       unlimited=layout != 'contiguous', **_layout_kwargs(layout, CMAQ_CHUNKS))
+        return filenames
@@ -2,7 +2,17 @@
 """
 
 from .base import *
+from .cache import *
+from .compression import *
+from .derived import *
+from .diskcache import *
+from .hdf5 import *
+from .memmap import *
 from .netcdf import *
+from .planner import *
+from .profiling import *
+from .times import *
+from .workers import *
 
 
 
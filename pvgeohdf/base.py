@@ -7,13 +7,135 @@ __all__ = [
 
 __displayname__ = 'Base Classes'
 
+import collections
+import contextlib
+import os
+import threading
+import time
+import warnings
+import weakref
+
+import numpy as np
 import netCDF4
+import vtk
+from vtk.util import numpy_support as nps
+
+try:
+    from mpi4py import MPI
+except ImportError:
+    MPI = None
 
 # Import PVGeo helpers:
 from PVGeo.base import ReaderBaseBase
 from PVGeo import _helpers
-from PVGeo import interface
 
+from .cache import TimestepCache
+from .compression import CompressedFrames, _make_pool, decompress_frames, get_codecs
+from .derived import DerivedVariable, parse_derived_variables
+from .diskcache import FrameDiskCache
+from .files import FileIndex, FilePool
+from .memmap import _fill_nan, _get_fill_value, _is_mappable, map_variables
+from .planner import ReadPlanner
+from .profiling import StageProfiler, _null_stage, profile_stage
+from .times import decode_cf_time, find_time_variable
+from .workers import ReadWorkerPool
+
+
+def _create_modified_callback(algorithm):
+    """Creates an observer callback that marks the algorithm as modified
+    without reading the file again. A weak reference avoids a reference cycle
+    between the algorithm and its array selection.
+    """
+    ref = weakref.ref(algorithm)
+    def _modified(*args, **kwargs):
+        alg = ref()
+        if alg is not None:
+            alg.modified(read_again=False)
+    return _modified
+
+
+def _create_file_opener(reader):
+    """Creates the opener of the files of a reader for its ``FilePool``. A
+    weak reference avoids a reference cycle between the reader and its pool.
+    """
+    ref = weakref.ref(reader)
+    def _open(fi):
+        alg = ref()
+        if alg is None:
+            raise RuntimeError('The reader of the file has been deleted.')
+        return alg._open_handle(fi)
+    return _open
+
+
+def _close_handle(handle):
+    """Closes a file handle of a ``FilePool``"""
+    handle.close()
+
+
+def _append_time_steps(data, blocks):
+    """Append blocks of timesteps to an array read in full. The array is kept
+    as the start of a larger buffer whose capacity doubles when it runs out
+    so following a growing run does not copy every timestep on each poll.
+    Timesteps already handed out stay valid as they are never moved.
+
+    Args:
+        data (np.ndarray): the timesteps read so far (first axis is time)
+        blocks (list(np.ndarray)): the blocks of new timesteps to append
+
+    Return:
+        np.ndarray: a view of the buffer holding every timestep
+    """
+    n = len(data)
+    total = n + sum(len(b) for b in blocks)
+    buf = data.base
+    if not (isinstance(buf, np.ndarray) and buf.base is None and buf.dtype == data.dtype
+            and buf.shape[1:] == data.shape[1:] and len(buf) >= total and data.flags.c_contiguous
+            and buf.__array_interface__['data'][0] == data.__array_interface__['data'][0]):
+        buf = np.empty((max(total, 2 * n),) + data.shape[1:], dtype=data.dtype)
+        buf[:n] = data
+    pos = n
+    for block in blocks:
+        buf[pos:pos + len(block)] = block
+        pos += len(block)
+    return buf[:total]
+
+
+class _FileHandle(object):
+    """An open file and the state kept for reading from it. The variables are
+    only memory mapped (with ``mapper(filename, dataset)``) when data is first
+    read so parsing the metadata of a file never maps it.
+    """
+    def __init__(self, filename, dataset, mapper=None):
+        self.filename = filename
+        self.dataset = dataset
+        self._mapper = mapper
+        self._memmaps = None
+        self.memmap_owner = None
+        # Read planners of the variables in the file
+        self.planners = dict()
+
+    @property
+    def memmaps(self):
+        """The memory mapped variables of the file by name"""
+        if self._memmaps is None:
+            self._memmaps = dict()
+            if self._mapper is not None:
+                self._memmaps, self.memmap_owner = self._mapper(self.filename, self.dataset)
+        return self._memmaps
+
+    def close(self):
+        """Close the file and drop its memory maps"""
+        self._memmaps = dict()
+        self._mapper = None
+        self.planners = dict()
+        if self.memmap_owner is not None:
+            self.memmap_owner.close()
+            self.memmap_owner = None
+        try:
+            self.dataset.close()
+        except RuntimeError:
+            pass # already closed
+        return
 
 
 
@@ -22,33 +144,386 @@ class netCDFReaderBase(ReaderBaseBase):
     __displayname__ = 'net CDF Reader Base'
     __category__ = 'base'
     extensions = 'nc netCDF netcdf'
+    # The axis of the file variables that is time
+    _time_axis = 0
+    # The in-memory compression modes: ``'auto'`` is the fastest codec
+    _compression_modes = ('none', 'auto', 'blosc', 'zstd', 'lz4', 'zlib')
+    # The most bytes read at once when compressing variables read in full
+    _compress_block_bytes = 64*1024**2
     def __init__(self, nOutputPorts=1, outputType='vtkPolyData', **kwargs):
         ReaderBaseBase.__init__(self, nOutputPorts=nOutputPorts, outputType=outputType, **kwargs)
         self._timesteps = [] # Initialize as empty
+        # The decoded time values of every timestep across the files and the
+        # stride of the timesteps that are exposed (and read)
+        self._time_values = None
+        self._time_stride = max(1, int(kwargs.get('time_stride', 1)))
         self._data = None
         self._dataSet = None
         self._keys = []
+        # When lazy, each timestep is sliced from the open dataset on request
+        # rather than reading whole variables
+        self._lazy = kwargs.get('lazy', False)
+        # Cache of lazily read timesteps (size given in megabytes)
+        self._cache = TimestepCache(max_bytes=kwargs.get('cache_size', 512)*1024**2,
+                                    prefetch=kwargs.get('prefetch', 2))
+        # netCDF4/HDF5 is not thread safe: all reads share this lock
+        self._io_lock = threading.RLock()
+        # Files are concatenated along time: the index maps a global time
+        # index to a file and the pool keeps a bounded number of them open
+        self._file_index = None
+        self._pool = None
+        self._max_open_files = kwargs.get('max_open_files', 16)
+        # The handle of the file being read from (``self._dataSet`` is its
+        # netCDF4 Dataset)
+        self._handle = None
+        # Slice plain, uncompressed variables straight from memory maps
+        self._use_memmap = kwargs.get('use_memmap', True)
+        # Optional persistent cache of converted arrays (size in megabytes)
+        self._disk_cache = None
+        self._disk_cache_size = kwargs.get('disk_cache_size', 10*1024)
+        self._fingerprint = None
+        if kwargs.get('cache_dir', None):
+            self._disk_cache = FrameDiskCache(kwargs['cache_dir'], max_bytes=self._disk_cache_size*1024**2)
+        # Open files for parallel netCDF4/HDF5 I/O when running under MPI
+        self._parallel_io = kwargs.get('parallel_io', False)
+        # Read in this many worker processes (0 reads in this process)
+        self._nworkers = kwargs.get('workers', 0)
+        self._workers = None
+        # Keep the timesteps of variables read in full compressed in memory
+        # with this codec (see ``get_compression_modes()``) and decompress them on
+        # this many threads
+        self._compression = self._get_compression_mode(kwargs.get('compression', 'none'))
+        self._decompress_threads = kwargs.get('decompress_threads', 4)
+        self._decompress_pool = None
+        # Follow files that are still being written: poll the last file for
+        # new timesteps at most every ``follow_interval`` seconds
+        self._follow = kwargs.get('follow', False)
+        self._follow_interval = kwargs.get('follow_interval', 1.0)
+        self._last_poll = 0.0
+        self._file_stat = None
+        self._file_time_values = []
+        # Variables derived from the file variables by expressions
+        self._derived = collections.OrderedDict()
+        for name, expression in kwargs.get('derived', dict()).items():
+            self._derived[name] = DerivedVariable(name, expression)
+        # Record the time and memory of each stage when profiling (as set by
+        # the ``PVGEOHDF_PROFILE`` environment variable or ``profile=True``)
+        self._profiler = StageProfiler.from_environment()
+        self._profile_from_env = self._profiler is not None
+        if self._profiler is None and kwargs.get('profile', False):
+            self._profiler = StageProfiler()
+        # Choose which variables get read. Toggling an array only reads that
+        # variable: it does not trigger a full read of the file.
+        self._selection = vtk.vtkDataArraySelection()
+        self._selection.AddObserver('ModifiedEvent', _create_modified_callback(self))
 
     #### File reading methods ####
 
     def get_file_name(self):
-        """Super class has file names as a list but we will only handle a single
-        netCDF file. This provides a conveinant way of making sure we only
-        access that single file. A user could still access the list of file
-        names using ``GetFileNames()``.
+        """Get the first file name. Files are concatenated along time so this
+        is the file that the variable metadata is parsed from. A user could
+        still access the list of file names using ``get_file_names()``.
         """
         return ReaderBaseBase.get_file_names(self, idx=0)
 
+    def _get_time_length(self, dataset):
+        """OVERRIDE: Get the number of timesteps in an open dataset. By
+        default this is the length of the unlimited dimension.
+        """
+        for dim in dataset.dimensions.values():
+            if dim.isunlimited():
+                return len(dim)
+        raise RuntimeError('Unable to find the time dimension of the dataset.')
+
+    def _get_time_values(self, dataset, length):
+        """OVERRIDE: Decode the time values of the timesteps in an open dataset
+        to days since 1970-01-01 or return ``None`` if the file has no time
+        values. By default this decodes a CF-convention time coordinate.
+
+        Args:
+            dataset (netCDF4.Dataset): the open dataset
+            length (int): the number of timesteps in the dataset
+        """
+        variable = find_time_variable(dataset, length=length)
+        if variable is None:
+            return None
+        calendar = variable.getncattr('calendar') if 'calendar' in variable.ncattrs() else 'standard'
+        return decode_cf_time(self._fill_masked(variable[:]), variable.getncattr('units'), calendar=calendar)
+
+    def _set_time_values(self, values):
+        """Set the time values of every timestep from the decoded values of
+        each file. The timestep indices are used when any file has no time
+        values or the values are not increasing.
+        """
+        total = len(self._file_index)
+        if any(v is None for v in values):
+            self._time_values = np.arange(total, dtype=np.float64)
+        else:
+            self._time_values = np.concatenate(values) if len(values) else np.empty(0)
+            if np.any(np.diff(self._time_values) <= 0):
+                warnings.warn('The time values of the files are not increasing: using the timestep indices instead.')
+                self._time_values = np.arange(total, dtype=np.float64)
+        self._update_exposed_time_steps()
+        return self._time_values
+
+    def _update_exposed_time_steps(self):
+        """Expose every ``stride``-th timestep to the pipeline"""
+        if self._time_values is None:
+            self._timesteps = []
+        else:
+            self._timesteps = self._time_values[::self._time_stride].tolist()
+        return self._timesteps
+
     def _get_file_contents(self, idx=None):
-        """This opens a netCDF4 DataSet.
-        This happens up front so the data read happens only once and ParaView
-        will be able to make calls on the ``RequestData`` method to get the data
-        for a specific timestep"""
-        self._dataSet = netCDF4.Dataset(self.get_file_name())
+        """This builds the time index of the files from only their headers
+        and opens the first file. Files are concatenated along time and are
+        opened lazily as their timesteps are needed, keeping a bounded number
+        of them open at once. No variable data is read here: this is the
+        metadata phase.
+        """
+        with self._io_lock, self._stage('headers'):
+            self._cache.clear()
+            self._close_file()
+            filenames = list(self.get_file_names())
+            workers = self._get_workers() if len(filenames) > 1 else None
+            first = None
+            if workers is not None:
+                # Scan the headers of the files in parallel
+                headers = workers.map_headers(filenames)
+                # The workers were forked without the file index
+                self._shutdown_workers()
+            else:
+                headers = []
+                for filename in filenames:
+                    dataset = self._open_dataset(filename)
+                    try:
+                        length = self._get_time_length(dataset)
+                        headers.append((length, self._get_time_values(dataset, length)))
+                    except Exception:
+                        dataset.close()
+                        if first is not None:
+                            first.close()
+                        raise
+                    # Keep the first file open rather than opening it again
+                    if first is None:
+                        first = dataset
+                    else:
+                        dataset.close()
+            self._file_index = FileIndex(filenames, [length for length, _ in headers])
+            self._file_time_values = [values for _, values in headers]
+            self._set_time_values(self._file_time_values)
+            self._file_stat = self._stat_file(filenames[-1])
+            if self._disk_cache is not None:
+                self._fingerprint = FrameDiskCache.fingerprint(filenames[0], type(self).__name__,
+                    tuple(FrameDiskCache.fingerprint(f) for f in filenames))
+            # Opening files for parallel I/O is collective so keep them all open
+            max_open = len(filenames) if self._use_parallel_io() else self._max_open_files
+            self._pool = FilePool(_create_file_opener(self), _close_handle, max_open=max_open)
+            if first is not None:
+                self._pool.add(0, self._open_handle(0, dataset=first))
+            self._set_file(0)
+        return 1
+
+    @staticmethod
+    def _stat_file(filename):
+        """Get the size and modification time of a file"""
+        stat = os.stat(filename)
+        return (stat.st_size, stat.st_mtime)
+
+    def _poll_for_new_time_steps(self):
+        """Read the header of the last file again if it has changed since it
+        was last read and add any timesteps appended to it. Only the new
+        timesteps of the variables read in full are read. Files that are still
+        being written must be the last of a series. This is not done with
+        parallel I/O where opening a file is collective across the MPI ranks.
+
+        Return:
+            int: the number of timesteps that were added
+        """
+        if self._file_index is None or self._use_parallel_io():
+            return 0
+        self._last_poll = time.time()
+        fi = len(self._file_index.filenames) - 1
+        filename = self._file_index.filenames[fi]
+        stat = self._stat_file(filename)
+        if stat == self._file_stat:
+            return 0
+        with self._io_lock, self._stage('follow'):
+            # Close the file before opening it again: the open handle does not
+            # see the new timesteps and HDF5 shares a file that is already
+            # open with new handles
+            current = self._handle is not None and self._handle.filename == filename
+            self._pool.discard(fi)
+            handle = self._pool.get(fi)
+            if current:
+                self._set_file(fi)
+            dataset = handle.dataset
+            old = self._file_index.lengths[fi]
+            length = self._get_time_length(dataset)
+            values = self._get_time_values(dataset, length)
+            if length <= old:
+                self._file_stat = stat
+                return 0
+            if values is None and self._file_time_values[fi] is not None:
+                # The new timesteps are only partly written: check again on
+                # the next poll
+                return 0
+            self._file_stat = stat
+            self._shutdown_workers()
+            self._file_index.set_length(fi, length)
+            self._file_time_values[fi] = values
+            self._set_time_values(self._file_time_values)
+            if self._disk_cache is not None:
+                filenames = self._file_index.filenames
+                self._fingerprint = FrameDiskCache.fingerprint(filenames[0], type(self).__name__,
+                    tuple(FrameDiskCache.fingerprint(f) for f in filenames))
+            self._extend_data()
+        return length - old
+
+    def _extend_data(self):
+        """Read the timesteps added to the files since the variables were
+        read in full. Compressed variables only compress the new timesteps.
+        """
+        if self._data is None:
+            return
+        for name, (region, step, data) in list(self._data.items()):
+            # The next exposed timestep of the stride the variable was read with
+            start = len(data) * step
+            blocks = [self._read_file_block(name, fi, a, b, region, step)
+                      for fi, a, b, _ in self._split_time_range(start, len(self._file_index), step)]
+            if len(blocks) == 0:
+                continue
+            if isinstance(data, CompressedFrames):
+                for block in blocks:
+                    data.extend(block)
+            else:
+                data = _append_time_steps(data, blocks)
+            self._data[name] = (region, step, data)
+        return
+
+    def _open_handle(self, fi, dataset=None):
+        """Open the file at an index of the file index (or wrap its already
+        open dataset)
+        """
+        filename = self._file_index.filenames[fi]
+        if dataset is None:
+            dataset = self._open_dataset(filename)
+        mapper = None
+        if self._use_memmap and not self._use_parallel_io():
+            mapper = map_variables
+        return _FileHandle(filename, dataset, mapper=mapper)
+
+    def _set_file(self, fi):
+        """Make the file at an index of the file index the one read from"""
+        self._handle = self._pool.get(fi)
+        self._dataSet = self._handle.dataset
+        return self._handle
+
+    @contextlib.contextmanager
+    def _use_file(self, fi):
+        """Hold the I/O lock while reading from the file at an index"""
+        with self._io_lock:
+            yield self._set_file(fi)
+
+    def _get_number_of_time_steps(self):
+        """Get the number of timesteps exposed to the pipeline: every
+        ``stride``-th timestep across all of the files.
+        """
+        if self._file_index is None:
+            return 0
+        return len(range(0, len(self._file_index), self._time_stride))
+
+    def _get_time_index(self, idx):
+        """Get the index into the files of an exposed timestep index"""
+        return int(idx) * self._time_stride
+
+    def _use_parallel_io(self):
+        """Returns ``True`` if files should be opened for parallel netCDF4/HDF5
+        I/O: this must be requested, running on more than one MPI rank, and
+        netCDF4 must be built with parallel support.
+        """
+        if not self._parallel_io or MPI is None:
+            return False
+        if MPI.COMM_WORLD.Get_size() < 2:
+            return False
+        return getattr(netCDF4, '__has_parallel4_support__', False) or \
+            getattr(netCDF4, '__has_pnetcdf_support__', False)
+
+    def _open_dataset(self, filename):
+        """Open a netCDF4 Dataset, using parallel I/O across the MPI ranks
+        when available. Opening in parallel is collective so every rank must
+        open the file.
+        """
+        if self._use_parallel_io():
+            return netCDF4.Dataset(filename, mode='r', parallel=True,
+                                   comm=MPI.COMM_WORLD, info=MPI.Info())
+        return netCDF4.Dataset(filename)
+
+    def _close_file(self):
+        """Closes all of the open files and stops any worker processes as
+        they hold their own copies of the files.
+        """
+        self._shutdown_workers()
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+        self._handle = None
+        self._dataSet = None
         return 1
 
+    def _get_workers(self):
+        """Get the pool of worker processes (starting it if needed) or
+        ``None`` when reading in this process. Workers are not used with
+        parallel I/O where each MPI rank already reads on its own.
+        """
+        if self._workers is None and self._nworkers > 0 and not self._use_parallel_io():
+            try:
+                self._workers = ReadWorkerPool(self, self._nworkers)
+            except (RuntimeError, ValueError) as err:
+                # e.g. there is no ``fork`` on this platform
+                warnings.warn('Unable to start worker processes: %s' % err)
+                self._nworkers = 0
+        return self._workers
+
+    def _shutdown_workers(self):
+        """Stop the worker processes (if any)"""
+        if self._workers is not None:
+            self._workers.shutdown()
+            self._workers = None
+        return
+
+    def _detach_files(self):
+        """Forget the open files without closing them. This is called in
+        forked worker processes, which open the files on their own. The
+        inherited handles are kept so that they are never closed from the
+        worker.
+        """
+        self._inherited = (self._pool, self._handle, self._cache)
+        self._pool = FilePool(_create_file_opener(self), _close_handle,
+                              max_open=self._max_open_files)
+        self._handle = None
+        self._dataSet = None
+        self._io_lock = threading.RLock()
+        self._cache = TimestepCache(max_bytes=0, prefetch=0)
+        self._workers = None
+        self._nworkers = 0
+        self._profiler = None
+        self._decompress_pool = None
+        return
+
+    def _stage(self, name):
+        """Get a context manager that records its body as a stage of the
+        profiler (if profiling).
+        """
+        if self._profiler is None:
+            return _null_stage
+        return self._profiler.stage(name)
+
     def _read_up_front(self):
-        """OVERRIDE: This parses the loaded dataset.
+        """OVERRIDE: This parses the loaded dataset. This is the metadata
+        phase: it must only read dimensions, variable names and dtypes, and
+        time values so that adding the reader to a pipeline is cheap. Data is
+        only read in ``RequestData`` through ``_get_arrays()``.
         """
         # Perform Read
         self._get_file_contents()
@@ -70,6 +545,532 @@ class netCDFReaderBase(ReaderBaseBase):
         #data = self._data[???]
         return data
 
+    @staticmethod
+    def _fill_masked(arr):
+        """netCDF4 returns masked arrays where values match the ``_FillValue``
+        or fall outside the valid range. VTK has no notion of a mask so masked
+        values become NaN for floating point arrays and the fill value for
+        integer arrays. Unmasked arrays are returned without a copy.
+        """
+        if not isinstance(arr, np.ma.MaskedArray):
+            return arr
+        if not np.ma.is_masked(arr):
+            return np.ma.getdata(arr)
+        if arr.dtype.kind in 'fc':
+            return arr.filled(np.nan)
+        return arr.filled()
+
+    def _get_variable(self, name):
+        """OVERRIDE: Get a variable of the open dataset by name"""
+        return self._dataSet.variables[name]
+
+    def _get_planner(self, name):
+        """Get the ``ReadPlanner`` of a variable in the open dataset"""
+        planners = self._handle.planners
+        if name not in planners:
+            variable = self._get_variable(name)
+            planners[name] = ReadPlanner(variable, time_axis=self._time_axis)
+        return planners[name]
+
+    def _read_variable(self, name, key=Ellipsis, out=None):
+        """Read a hyperslab of a variable from the open dataset in the
+        variable's native dtype. Variables stored as a plain block of bytes
+        are sliced from a memory map so the OS pages the data in on demand.
+        Otherwise the variable's chunk cache is sized for the hyperslab before
+        reading. Variables that ``netCDF4`` would only mask for fill values
+        are read without building a mask.
+
+        Args:
+            name (str): the name of the variable
+            key: the index/slices of the hyperslab to read
+            out (np.ndarray): an array with as many values as the hyperslab
+                to read into instead of returning a new array
+        """
+        with self._stage('read'):
+            if name in self._handle.memmaps:
+                arr = self._handle.memmaps[name][key]
+            else:
+                self._get_planner(name).tune(key)
+                variable = self._get_variable(name)
+                if _is_mappable(variable):
+                    variable.set_auto_mask(False)
+                    arr = variable[key]
+                    if arr.dtype.kind == 'f':
+                        arr = _fill_nan(arr, _get_fill_value(variable))
+                else:
+                    arr = self._fill_masked(variable[key])
+            if self._profiler is not None:
+                self._profiler.add_bytes_read(arr.nbytes)
+            if out is None:
+                return np.ascontiguousarray(arr)
+            np.copyto(out, np.reshape(arr, out.shape))
+            return out
+
+    def _get_read_dtype(self, name):
+        """Get the dtype that a variable of the open dataset is read as or
+        ``None`` when that depends on how ``netCDF4`` transforms its values
+        (e.g. a ``scale_factor``).
+        """
+        if name in self._handle.memmaps:
+            return self._handle.memmaps[name].dtype
+        variable = self._get_variable(name)
+        if not _is_mappable(variable):
+            return None
+        return np.dtype(variable.dtype).newbyteorder('=')
+
+    def _get_source_names(self, name):
+        """OVERRIDE: Get the names of the file variables that are read for an
+        array. This is only needed for arrays built from several variables.
+        """
+        return [name]
+
+    def _get_key(self, name, time, region=None):
+        """OVERRIDE: Get the index into a file variable of the timestep(s)
+        and region to read.
+
+        Args:
+            name (str): the name of the file variable
+            time (int or slice): the timestep index or a slice of timesteps
+            region: the hashable region from ``_get_region()`` to read or
+                ``None`` for the whole variable
+        """
+        key = [slice(None)] * (self._time_axis + 1)
+        key[self._time_axis] = time
+        return tuple(key)
+
+    def _read_block(self, name, start, stop, region=None, step=1, out=None):
+        """OVERRIDE: Read every ``step``-th timestep of ``[start, stop)`` of an
+        array from the open dataset as a contiguous array whose first axis is
+        time. The timesteps are local to the file being read from.
+
+        Args:
+            name (str): the name of the array
+            start (int): the first timestep to read
+            stop (int): one past the last timestep to read
+            region: the hashable region from ``_get_region()`` to read or
+                ``None`` for the whole variable
+            step (int): the stride of the timesteps to read
+            out (np.ndarray): the array from ``_allocate_all()`` (sliced to
+                these timesteps) to read into. Only readers that implement
+                ``_allocate_all()`` are given this.
+        """
+        raise NotImplementedError('Code me up!')
+
+    def _read_array(self, name, idx, region=None):
+        """Read a single timestep of a single array from the file holding it.
+        This is used by lazy readers and its result is cached.
+
+        Args:
+            name (str): the name of the array
+            idx (int): the global timestep index
+            region: the hashable region from ``_get_region()`` to read or
+                ``None`` for the whole variable
+        """
+        fi, local = self._file_index.locate(idx)
+        with self._use_file(fi):
+            return self._read_block(name, local, local + 1, region=region)[0]
+
+    def _read_all(self, name, region=None, step=1):
+        """Read every ``step``-th timestep of a single array from all of the
+        files as an array whose first axis is time. This is used by readers
+        that are not lazy.
+
+        Args:
+            name (str): the name of the array
+            region: the hashable region from ``_get_region()`` to read or
+                ``None`` for the whole variable
+            step (int): the stride of the timesteps to read
+        """
+        index = self._file_index
+        total = len(range(0, len(index), step))
+        ranges = self._split_time_range(0, len(index), step)
+        # A single file is always read in this process
+        workers = self._get_workers() if len(ranges) > 1 else None
+        out = None
+        if workers is None:
+            with self._use_file(ranges[0][0] if len(ranges) else 0):
+                out = self._allocate_all(name, total, region=region)
+        if out is None and len(ranges) == 1:
+            fi, start, stop, _ = ranges[0]
+            return self._read_file_block(name, fi, start, stop, region, step)
+        if out is not None:
+            # Read each file straight into its part of the final array
+            for fi, start, stop, pos in ranges:
+                n = len(range(start, stop, step))
+                self._read_file_block(name, fi, start, stop, region, step, out=out[pos:pos + n])
+            return out
+        if workers is not None:
+            # Read the files in parallel
+            blocks = workers.read_blocks(name, [r[:3] for r in ranges], region=region, step=step)
+        else:
+            blocks = (self._read_file_block(name, fi, start, stop, region, step)
+                      for fi, start, stop, _ in ranges)
+        for (_, _, _, pos), block in zip(ranges, blocks):
+            if out is None:
+                out = np.empty((total,) + block.shape[1:], dtype=block.dtype)
+            out[pos:pos + len(block)] = block
+        return out
+
+    def _allocate_all(self, name, total, region=None):
+        """OVERRIDE: Allocate the array that ``total`` timesteps of an array
+        are read into when every timestep is read, or return ``None`` to have
+        the blocks of each file stacked instead. Readers that allocate the
+        array must accept ``out`` in ``_read_block()``.
+        """
+        return None
+
+    def _read_file_block(self, name, fi, start, stop, region=None, step=1, out=None):
+        """Read a block of timesteps of an array from the file at an index"""
+        with self._use_file(fi):
+            if out is not None:
+                return self._read_block(name, start, stop, region=region, step=step, out=out)
+            return self._read_block(name, start, stop, region=region, step=step)
+
+    def _split_time_range(self, start, stop, step=1):
+        """Split every ``step``-th timestep of the global ``[start, stop)``
+        range by file.
+
+        Return:
+            list(tuple(int)): ``(file_index, local_start, local_stop, pos)``
+            of each file holding any of the timesteps where ``pos`` is the
+            position of the file's first timestep in the strided range
+        """
+        ranges = []
+        for fi, a, b in self._file_index.split(start, stop):
+            offset = self._file_index.offsets[fi]
+            # The first timestep of the file that falls on the stride
+            a += (start - offset - a) % step
+            if a < b:
+                ranges.append((fi, a, b, (offset + a - start) // step))
+        return ranges
+
+    def _get_region(self):
+        """OVERRIDE: Get a hashable description of the part of each variable
+        that the pipeline requested (e.g. an update extent) or ``None`` for the
+        whole variable. This is part of the cache key.
+        """
+        return None
+
+    def _take_region(self, name, arr, region):
+        """OVERRIDE: Take the region from a single timestep of a variable that
+        has been read in full. Readers that use ``_get_region()`` must
+        implement this.
+        """
+        if region is None:
+            return arr
+        raise NotImplementedError('Code me up!')
+
+    @profile_stage('load')
+    def _load_array(self, key):
+        """Reads an ``(idx, name, region)`` cache key while holding the I/O
+        lock so that the prefetch thread and the pipeline never access the
+        dataset at once. ``idx`` is the index into the files (not the exposed
+        timestep index).
+        """
+        idx, name, region = key
+        if self._workers is not None:
+            return self._workers.result(key)
+        arr = self._load_from_disk(key)
+        if arr is not None:
+            return arr
+        fi, local = self._file_index.locate(idx)
+        with self._use_file(fi):
+            # Read the whole chunk aligned block of timesteps when the file is
+            # chunked along time so its chunks are only decompressed once
+            source = self._get_source_names(name)[0]
+            planner = self._get_planner(source)
+            start, stop = planner.get_time_block(local, self._get_key(source, local, region),
+                                                 self._cache.get_max_bytes() // 4)
+            if stop - start < 2:
+                arr = self._read_array(name, idx, region=region)
+                self._save_to_disk(key, arr)
+                return arr
+            block = self._read_block(name, start, stop, region=region)
+        # NOTE: the timesteps are views of the block so the block is freed
+        #       once all of them have been evicted
+        # Only keep the timesteps that fall on the time stride
+        offset = self._file_index.offsets[fi]
+        for i in range(start, stop):
+            if (offset + i) % self._time_stride:
+                continue
+            self._save_to_disk((offset + i, name, region), block[i - start])
+            if offset + i != idx:
+                self._cache.put((offset + i, name, region), block[i - start])
+        return block[local - start]
+
+    @profile_stage('load_all')
+    def _load_all(self, name, region=None):
+        """Get every exposed timestep of an array from the on-disk cache or
+        else read it from the open dataset.
+        """
+        step = self._time_stride
+        key = (slice(None, None, step), name, region)
+        arr = self._load_from_disk(key)
+        if arr is None:
+            with self._io_lock:
+                arr = self._read_all(name, region=region, step=step)
+            self._save_to_disk(key, arr)
+        return arr
+
+    def _load_from_disk(self, key):
+        """Get an ``(idx, name, region)`` key from the on-disk cache (if there
+        is one) or ``None`` on a miss. ``idx`` is a slice for every
+        ``step``-th timestep.
+        """
+        fingerprint, key = self._get_disk_key(key)
+        if fingerprint is None:
+            return None
+        with self._stage('disk_cache'):
+            return self._disk_cache.get(fingerprint, key)
+
+    def _save_to_disk(self, key, arr):
+        """Save an ``(idx, name, region)`` key to the on-disk cache if there
+        is one.
+        """
+        fingerprint, key = self._get_disk_key(key)
+        if fingerprint is not None:
+            with self._stage('disk_cache'):
+                self._disk_cache.put(fingerprint, key, arr)
+        return
+
+    def _get_disk_key(self, key):
+        """Get the fingerprint and key of an ``(idx, name, region)`` key in the
+        on-disk cache. Single timesteps are stored with the file holding them
+        so adding files to a series does not invalidate them.
+        """
+        if self._disk_cache is None or self._fingerprint is None:
+            return None, key
+        idx, name, region = key
+        if isinstance(idx, slice):
+            return self._fingerprint, key
+        fi, local = self._file_index.locate(idx)
+        filename = self._file_index.filenames[fi]
+        return FrameDiskCache.fingerprint(filename, type(self).__name__), (local, name, region)
+
+    def _get_arrays(self, idx, names=None):
+        """Get an ordered dictionary of the arrays for a single timestep. Only
+        the given variables (the selected arrays by default) are ever read from
+        disk and only the requested region is read. Derived variables are
+        evaluated from the variables they use, which are read whether or not
+        they are selected.
+
+        Args:
+            idx (int): the exposed timestep index
+            names (list(str)): the variables to get
+        """
+        if names is None:
+            names = self.get_selected_arrays()
+        sources, derived = self._split_derived(names)
+        if len(derived) == 0:
+            return self._get_file_arrays(idx, names)
+        arrays = self._get_file_arrays(idx, sources)
+        previous = None
+        prev_names = sorted(set(n for d in derived for n in d.previous))
+        if len(prev_names) and idx > 0:
+            previous = self._get_file_arrays(idx - 1, prev_names)
+        with self._stage('derive'):
+            for d in derived:
+                arrays[d.name] = d.evaluate(arrays, previous=previous, dt=self._get_time_delta(idx))
+        return collections.OrderedDict((name, arrays[name]) for name in names)
+
+    def _split_derived(self, names):
+        """Split the names of arrays into the file variables to read (those
+        given and those the derived variables use) and the derived variables
+        """
+        sources = [n for n in names if n not in self._derived]
+        derived = [self._derived[n] for n in names if n in self._derived]
+        for d in derived:
+            missing = [n for n in d.get_sources() if not self._has_variable(n)]
+            if len(missing):
+                raise _helpers.PVGeoError('Derived variable `%s` uses unknown variables: %s'
+                                          % (d.name, ', '.join(missing)))
+            sources.extend(n for n in d.get_sources() if n not in sources)
+        return sources, derived
+
+    def _has_variable(self, name):
+        """OVERRIDE: Returns ``True`` if a name is a file variable that can
+        be read (and used by derived variables)
+        """
+        return name in self._keys
+
+    def _get_time_delta(self, idx):
+        """Get the time between an exposed timestep and the one before it (or
+        the one after it for the first timestep)
+        """
+        if len(self._timesteps) < 2:
+            return 0.0
+        i = min(max(1, idx), len(self._timesteps) - 1)
+        return self._timesteps[i] - self._timesteps[i - 1]
+
+    def _get_file_arrays(self, idx, names):
+        """Get an ordered dictionary of the arrays of file variables for a
+        single timestep. Lazy readers go through the timestep cache and queue
+        the next few timesteps to be prefetched on a background thread.
+        Otherwise every timestep of a variable is read the first time it is
+        needed (in full when no region is requested) and, when compressing,
+        kept compressed and decompressed a timestep at a time.
+
+        Args:
+            idx (int): the exposed timestep index
+            names (list(str)): the variables to get
+        """
+        self._release_arrays()
+        region = self._get_region()
+        arrays = collections.OrderedDict()
+        if self._lazy:
+            # Cache keys hold the index into the files so they stay valid when
+            # the time stride changes
+            step = self._time_stride
+            gidx = self._get_time_index(idx)
+            stop = min(gidx + step * (1 + self._cache.get_prefetch()), len(self._file_index))
+            keys = [(i, name, region) for i in range(gidx + step, stop, step) for name in names]
+            workers = self._get_workers()
+            if workers is not None:
+                # Read this timestep and the prefetched ones at once in the
+                # workers: the pipeline only waits on this timestep
+                for key in [(gidx, name, region) for name in names] + keys:
+                    if key not in self._cache:
+                        workers.submit(key)
+            for name in names:
+                arrays[name] = self._cache.get((gidx, name, region), self._load_array)
+            self._cache.prefetch(keys, self._load_array)
+            return arrays
+        if self._data is None:
+            self._data = dict()
+        frames = dict()
+        for name in names:
+            # A variable read in full serves any region but a variable read
+            # for one region (e.g. this rank's piece) only serves that region.
+            # Variables hold the exposed timesteps of the stride they were
+            # read with.
+            stored = self._data.get(name, None)
+            if stored is None or stored[1] != self._time_stride or \
+                    (stored[0] is not None and stored[0] != region):
+                if self._compression != 'none':
+                    data = self._load_compressed(name, region=region)
+                else:
+                    data = self._load_all(name, region=region)
+                stored = (region, self._time_stride, data)
+                self._data[name] = stored
+            if isinstance(stored[2], CompressedFrames):
+                frames[name] = stored[2]
+            else:
+                arrays[name] = stored[2][idx]
+        if len(frames):
+            # Decompress the timestep of each variable on its own thread
+            with self._stage('decompress'):
+                decoded = decompress_frames(frames, idx, pool=self._get_decompress_pool())
+        for name in names:
+            arr = arrays[name] if name not in frames else decoded[name]
+            if self._data[name][0] is None:
+                with self._stage('take_region'):
+                    arr = self._take_region(name, arr, region)
+            arrays[name] = arr
+        return arrays
+
+    @profile_stage('load_compressed')
+    def _load_compressed(self, name, region=None):
+        """Get every exposed timestep of an array compressed in memory. The
+        timesteps are read (or taken from the on-disk cache) a block at a
+        time and compressed so only one block is ever held uncompressed.
+        """
+        step = self._time_stride
+        frames = CompressedFrames(self._compression)
+        arr = self._load_from_disk((slice(None, None, step), name, region))
+        if arr is not None:
+            with self._stage('compress'):
+                frames.extend(arr)
+            return frames
+        with self._io_lock:
+            for fi, start, stop, _ in self._split_time_range(0, len(self._file_index), step):
+                # Read a single timestep first to size the blocks
+                rows = 1
+                while start < stop:
+                    end = min(stop, start + rows * step)
+                    block = self._read_file_block(name, fi, start, end, region, step)
+                    with self._stage('compress'):
+                        frames.extend(block)
+                    rows = max(1, self._compress_block_bytes // max(block[0:1].nbytes, 1))
+                    start = end
+        return frames
+
+    def _get_decompress_pool(self):
+        """Get the threads that compressed timesteps are decompressed on (or
+        ``None`` to decompress on this thread)
+        """
+        if self._decompress_pool is None:
+            self._decompress_pool = _make_pool(self._decompress_threads)
+        return self._decompress_pool
+
+    def _release_arrays(self):
+        """Drop any fully read variables that are no longer selected (or used
+        by a selected derived variable)
+        """
+        if self._data is not None:
+            selected, _ = self._split_derived(self.get_selected_arrays())
+            for name in list(self._data.keys()):
+                if name in self._keys and name not in selected:
+                    del self._data[name]
+        return
+
+    def _update_array_selection(self):
+        """Sync the array selection with the variables (``self._keys``) found
+        in the file and the derived variables. New variables are enabled and
+        existing choices are kept.
+        """
+        names = self._keys + list(self._derived.keys())
+        for name in names:
+            if not self._selection.ArrayExists(name):
+                self._selection.AddArray(name)
+        for i in reversed(range(self._selection.GetNumberOfArrays())):
+            name = self._selection.GetArrayName(i)
+            if name not in names:
+                self._selection.RemoveArrayByIndex(i)
+        return
+
+    #### Output helpers ####
+
+    @staticmethod
+    def _get_update_piece(outInfo):
+        """Get the ``(piece, number_of_pieces, ghost_levels)`` requested of the
+        first output port. Under MPI (pvserver/pvbatch) each rank is asked for
+        its own piece.
+        """
+        info = outInfo.GetInformationObject(0)
+        sddp = vtk.vtkStreamingDemandDrivenPipeline
+        piece, npieces, ghosts = 0, 1, 0
+        if info.Has(sddp.UPDATE_PIECE_NUMBER()):
+            piece = info.Get(sddp.UPDATE_PIECE_NUMBER())
+        if info.Has(sddp.UPDATE_NUMBER_OF_PIECES()):
+            npieces = info.Get(sddp.UPDATE_NUMBER_OF_PIECES())
+        if info.Has(sddp.UPDATE_NUMBER_OF_GHOST_LEVELS()):
+            ghosts = info.Get(sddp.UPDATE_NUMBER_OF_GHOST_LEVELS())
+        return piece, npieces, ghosts
+
+    @staticmethod
+    def _to_vtk_array(arr, name=None):
+        """Wrap a NumPy array as a ``vtkDataArray`` without copying. The VTK
+        array holds a reference to the NumPy buffer so the buffer lives as long
+        as the VTK array does. Only non-contiguous arrays are copied.
+        """
+        arr = np.ascontiguousarray(arr)
+        vtkarr = nps.numpy_to_vtk(arr, deep=0)
+        # ``numpy_to_vtk`` already stores the buffer on the wrapper but make
+        # sure it survives if the Python wrapper is recreated
+        vtkarr._numpy_reference = arr
+        if name is not None:
+            vtkarr.SetName(name)
+        return vtkarr
+
+    def _add_arrays(self, data, arrays):
+        """Add a dictionary of NumPy arrays to the given
+        ``vtkDataSetAttributes`` (point or cell data) without copying.
+        """
+        with self._stage('to_vtk'):
+            for name, arr in arrays.items():
+                data.AddArray(self._to_vtk_array(arr, name=name))
+        return data
+
     #### Algorithm Methods ####
 
     def RequestData(self, request, inInfo, outInfo):
@@ -92,12 +1093,13 @@ class netCDFReaderBase(ReaderBaseBase):
         if self.need_to_read():
             self._read_up_front()
         # NOTE: Assumes self._read_up_front() handls timestep generation
+        executive = self.GetExecutive()
+        oi = executive.GetOutputInformation(0)
+        #oi = outInfo.GetInformationObject(0)
+        # Always clear the old timesteps: the time stride may leave only one
+        oi.Remove(executive.TIME_STEPS())
+        oi.Remove(executive.TIME_RANGE())
         if len(self._timesteps) > 1:
-            executive = self.GetExecutive()
-            oi = executive.GetOutputInformation(0)
-            #oi = outInfo.GetInformationObject(0)
-            oi.Remove(executive.TIME_STEPS())
-            oi.Remove(executive.TIME_RANGE())
             for t in self._timesteps:
                 oi.Append(executive.TIME_STEPS(), t)
             oi.Append(executive.TIME_RANGE(), self._timesteps[0])
@@ -111,12 +1113,327 @@ class netCDFReaderBase(ReaderBaseBase):
         """
         if self.need_to_read():
             self._read_up_front()
+        elif self._is_poll_due():
+            self._poll_for_new_time_steps()
         self._update_time_steps()
         return 1 # NOTE: ALWAYS return 1 on pipeline methods
 
+    def RequestUpdateExtent(self, request, inInfo, outInfo):
+        """Used by pipeline each time data is requested (e.g. when the time
+        changes): a followed file is checked for new timesteps here and any
+        new timesteps are listed on the output information right away.
+        """
+        if not self.need_to_read() and self._is_poll_due():
+            if self._poll_for_new_time_steps() > 0:
+                # NOTE: marking the reader modified during an update does not
+                #       run ``RequestInformation`` again as the pipeline marks
+                #       its information as current once the data is executed
+                self._update_time_steps()
+        return 1 # NOTE: ALWAYS return 1 on pipeline methods
+
+    def _is_poll_due(self):
+        """Returns ``True`` when following and the last file has not been
+        checked for new timesteps for ``follow_interval`` seconds
+        """
+        return self._follow and time.time() - self._last_poll >= self._follow_interval
+
 
     #### Getters/Setters ####
 
+    def set_lazy(self, flag):
+        """Set whether timesteps are read lazily. When lazy, each timestep is
+        read from disk when it is requested rather than reading every timestep
+        of a variable the first time it is needed.
+        """
+        if self._lazy != flag:
+            self._lazy = flag
+            # Nothing needs to be parsed again: just drop the data read in
+            # full and the cached timesteps
+            self._data = None
+            self._cache.clear()
+            self.modified(read_again=False)
+
+    def get_lazy(self):
+        """Returns ``True`` if timesteps are read lazily"""
+        return self._lazy
+
+    def set_time_stride(self, stride):
+        """Set the stride of the timesteps to expose: only every ``stride``-th
+        timestep is listed on the pipeline and read from disk.
+        """
+        stride = max(1, int(stride))
+        if self._time_stride != stride:
+            self._time_stride = stride
+            self._update_exposed_time_steps()
+            self.modified(read_again=False)
+
+    def get_time_stride(self):
+        """Returns the stride of the exposed timesteps"""
+        return self._time_stride
+
+    def set_cache_size(self, size):
+        """Set the byte budget of the timestep cache in megabytes"""
+        nbytes = int(size * 1024**2)
+        if self._cache.get_max_bytes() != nbytes:
+            self._cache.set_max_bytes(nbytes)
+            self.modified(read_again=False)
+
+    def set_prefetch(self, n):
+        """Set the number of timesteps to read ahead of the requested timestep
+        on a background thread. Use 0 to disable prefetching.
+        """
+        if self._cache.get_prefetch() != n:
+            self._cache.set_prefetch(n)
+            self.modified(read_again=False)
+
+    def set_parallel_io(self, flag):
+        """Set whether to open files for parallel netCDF4/HDF5 I/O when
+        running on more than one MPI rank. This requires ``mpi4py`` and a
+        netCDF4 build with parallel support, otherwise each rank opens the
+        file on its own. Either way, each rank only reads its own piece.
+        """
+        if self._parallel_io != flag:
+            self._parallel_io = flag
+            self.modified(read_again=True)
+
+    def set_workers(self, n):
+        """Set the number of worker processes to read in. Each worker opens
+        the files on its own so timesteps (and the files of a series) are
+        read in parallel while the pipeline only waits on the timestep it
+        needs. Use 0 to read in this process.
+        """
+        n = max(0, int(n))
+        if self._nworkers != n:
+            self._shutdown_workers()
+            self._nworkers = n
+            self.modified(read_again=False)
+
+    def set_use_memmap(self, flag):
+        """Set whether variables stored as a plain block of bytes (netCDF-3
+        files and contiguous, uncompressed netCDF4 variables) are sliced from
+        a memory map of the file instead of read through ``netCDF4``.
+        """
+        if self._use_memmap != flag:
+            self._use_memmap = flag
+            self.modified(read_again=True)
+
+    def set_max_open_files(self, n):
+        """Set the most files of a time series to keep open at once"""
+        if self._max_open_files != n:
+            self._max_open_files = n
+            if self._pool is not None and not self._use_parallel_io():
+                self._pool.set_max_open(n)
+            self.modified(read_again=False)
+
+    def set_cache_dir(self, cache_dir):
+        """Set the directory of a persistent on-disk cache of the arrays that
+        have been read so reopening a file that has already been viewed does
+        not read it again. An empty string or ``None`` turns the cache off.
+        """
+        current = self._disk_cache.get_cache_dir() if self._disk_cache is not None else None
+        if not cache_dir:
+            cache_dir = None
+        if cache_dir is not None:
+            cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+        if current != cache_dir:
+            self._disk_cache = None
+            self._fingerprint = None
+            if cache_dir is not None:
+                self._disk_cache = FrameDiskCache(cache_dir, max_bytes=self._disk_cache_size*1024**2)
+            self.modified(read_again=True)
+
+    def set_disk_cache_size(self, size):
+        """Set the size cap of the on-disk cache in megabytes. The least
+        recently used entries are deleted to stay under the cap.
+        """
+        if self._disk_cache_size != size:
+            self._disk_cache_size = size
+            if self._disk_cache is not None:
+                self._disk_cache.set_max_bytes(size*1024**2)
+            self.modified(read_again=False)
+
+    def get_data_array_selection(self):
+        """Returns the ``vtkDataArraySelection`` used to choose which
+        variables are read from the file.
+        """
+        return self._selection
+
+    def get_selected_arrays(self):
+        """Returns the names of the variables that are enabled in the array
+        selection, in file order followed by the derived variables.
+        """
+        names = self._keys + list(self._derived.keys())
+        return [k for k in names if self._selection.ArrayIsEnabled(k)]
+
+    def set_profile(self, flag):
+        """Set whether to record the time, bytes read, and bytes allocated of
+        each stage of reading. See ``pvgeohdf.profiling`` for the environment
+        variables that turn this on for every reader: profiling turned on
+        that way stays on.
+        """
+        flag = flag or self._profile_from_env
+        if (self._profiler is not None) != flag:
+            self._profiler = StageProfiler() if flag else None
+            self.modified(read_again=False)
+
+    def get_profiler(self):
+        """Returns the ``StageProfiler`` of this reader or ``None`` if it is
+        not being profiled.
+        """
+        return self._profiler
+
+    def export_profile(self, filename):
+        """Write the recorded stages to a ``.json`` (Chrome trace event) or
+        ``.csv`` file.
+        """
+        if self._profiler is None:
+            raise RuntimeError('This reader is not being profiled: use ``set_profile(True)``.')
+        return self._profiler.write(filename)
+
+    def set_compression(self, codec):
+        """Set the codec that the timesteps of variables read in full are kept
+        compressed with (by name or index of ``get_compression_modes()``). Use
+        ``'none'`` to keep them uncompressed and ``'auto'`` for the fastest
+        available codec. This does not apply when lazy.
+        """
+        codec = self._get_compression_mode(codec)
+        if self._compression != codec:
+            self._compression = codec
+            # The variables read in full are read again with the new codec
+            self._data = None
+            self.modified(read_again=False)
+
+    def _get_compression_mode(self, codec):
+        """Get the name of a compression mode given by name or index of
+        ``get_compression_modes()``, checking that its codec is installed
+        """
+        modes = self.get_compression_modes()
+        if not isinstance(codec, str):
+            codec = modes[int(codec)]
+        if codec not in self._compression_modes:
+            raise _helpers.PVGeoError('Compression `%s` not understood.' % codec)
+        if codec not in modes:
+            raise _helpers.PVGeoError('The %s codec is not installed: use one of %s.'
+                                      % (codec, ', '.join(modes)))
+        return codec
+
+    @classmethod
+    def get_compression_modes(cls):
+        """Returns the compression modes whose codecs are installed"""
+        available = get_codecs()
+        return [m for m in cls._compression_modes if m in ('none', 'auto') or m in available]
+
+    def get_compression(self):
+        """Returns the codec the timesteps are kept compressed with"""
+        return self._compression
+
+    def set_decompress_threads(self, n):
+        """Set the number of threads that compressed timesteps are
+        decompressed on
+        """
+        if self._decompress_threads != n:
+            self._decompress_threads = n
+            if self._decompress_pool is not None:
+                self._decompress_pool.shutdown(wait=False)
+                self._decompress_pool = None
+            self.modified(read_again=False)
+
+    def get_compression_stats(self):
+        """Returns a dictionary of the bytes of the timesteps held compressed
+        in memory before (``raw_nbytes``) and after (``nbytes``) compression
+        along with their ``ratio``.
+        """
+        raw, nbytes = 0, 0
+        for stored in (self._data or dict()).values():
+            if isinstance(stored[2], CompressedFrames):
+                raw += stored[2].raw_nbytes
+                nbytes += stored[2].nbytes
+        return dict(raw_nbytes=raw, nbytes=nbytes, ratio=raw / float(max(1, nbytes)))
+
+    def set_follow(self, flag):
+        """Set whether to follow files that are still being written: the last
+        file is checked for new timesteps each time the pipeline updates (at
+        most every ``follow_interval`` seconds) and only the new timesteps are
+        read and listed on the output.
+        """
+        if self._follow != flag:
+            self._follow = flag
+            self.modified(read_again=False)
+
+    def get_follow(self):
+        """Returns whether files that are still being written are followed"""
+        return self._follow
+
+    def set_follow_interval(self, seconds):
+        """Set the least number of seconds between checks for new timesteps"""
+        if self._follow_interval != seconds:
+            self._follow_interval = seconds
+            self.modified(read_again=False)
+
+    def check_for_new_time_steps(self):
+        """Check the last file for new timesteps now and tell the pipeline
+        when there are any. Call this (e.g. in a ``pvpython`` loop) to refresh
+        a file that is still being written without reading it again.
+
+        Return:
+            int: the number of timesteps that were added
+        """
+        if self.need_to_read():
+            return 0
+        added = self._poll_for_new_time_steps()
+        if added > 0:
+            self.modified(read_again=False)
+        return added
+
+    def add_derived_variable(self, name, expression):
+        """Add (or replace) a variable derived from the file variables by a
+        NumPy expression, e.g. ``add_derived_variable('NOX', 'NO + NO2')``.
+        See ``pvgeohdf.derived`` for what expressions may use. Only the
+        variables the expression uses are read.
+        """
+        if name in self._keys:
+            raise _helpers.PVGeoError('`%s` is already a variable of the file.' % name)
+        try:
+            variable = DerivedVariable(name, expression)
+        except ValueError as err:
+            raise _helpers.PVGeoError(str(err))
+        self._derived[name] = variable
+        self._update_array_selection()
+        self.modified(read_again=False)
+
+    def remove_derived_variable(self, name):
+        """Remove a derived variable by name"""
+        if self._derived.pop(name, None) is not None:
+            self._update_array_selection()
+            self.modified(read_again=False)
+
+    def set_derived_variables(self, text):
+        """Set every derived variable from ``name = expression`` definitions
+        separated by new lines or semicolons (e.g. ``NOX = NO + NO2``)
+        """
+        try:
+            definitions = parse_derived_variables(text)
+        except ValueError as err:
+            raise _helpers.PVGeoError(str(err))
+        if [(d.name, d.expression) for d in self._derived.values()] == definitions:
+            return
+        self._derived = collections.OrderedDict()
+        for name, expression in definitions:
+            self.add_derived_variable(name, expression)
+        self._update_array_selection()
+        self.modified(read_again=False)
+
+    def get_derived_variables(self):
+        """Returns a dictionary of the expressions of the derived variables
+        by name
+        """
+        return collections.OrderedDict((d.name, d.expression) for d in self._derived.values())
+
+    def get_cache_stats(self):
+        """Returns a dictionary of the timestep cache's hit, miss, and eviction
+        counters along with its current size in bytes.
+        """
+        return self._cache.get_stats()
 
     def get_time_step_values(self):
         """Use this in ParaView decorator to register timesteps on the pipeline.
@@ -135,14 +1452,195 @@ class netCDFPointsReaderBase(netCDFReaderBase):
     __category__ = 'base'
     def __init__(self, nOutputPorts=1, outputType='vtkPolyData', **kwargs):
         netCDFReaderBase.__init__(self, nOutputPorts=nOutputPorts, outputType=outputType, **kwargs)
+        self._verts = None
+        # Subclasses set the number of points when parsing the file
+        self._npoints = 0
+        # The ``[start, stop)`` range of point indices of this piece
+        self._piece_range = None
+        # Level of detail: only output a subset of the points
+        self._lod_mode = kwargs.get('lod_mode', 'none')
+        self._lod_target = kwargs.get('lod_target', 100000)
+        self._lod_seed = kwargs.get('lod_seed', 0)
+        # The ``(lod, npoints)`` and indices of the last random subset
+        self._lod_index = None
+
+    # The names of the level of detail modes
+    _lod_modes = ('none', 'stride', 'random')
+
+    # The name used for the XYZ points when reading and caching them. This is
+    # never the name of a variable in a file.
+    _points_key = '__points__'
+
+    #### File reading methods ####
+
+    @profile_stage('get_raw_data')
+    def _get_raw_data(self, idx=0):
+        """Get the XYZ points as a contiguous ``(n, 3)`` array and an ordered
+        dictionary of contiguous attribute arrays of the selected variables
+        for the timestep.
+        """
+        arrays = self._get_arrays(idx, [self._points_key] + self.get_selected_arrays())
+        points = arrays.pop(self._points_key)
+        return points, arrays
 
+    def _get_lod(self):
+        """Get the hashable ``(mode, target)`` level of detail or ``None``
+        when every point is output. A random subset also holds its seed as it
+        keys the cached points.
+        """
+        if self._lod_mode == 'none' or self._lod_target >= self._npoints:
+            return None
+        if self._lod_mode == 'random':
+            return (self._lod_mode, self._lod_target, self._lod_seed)
+        return (self._lod_mode, self._lod_target)
+
+    def _get_lod_index(self, lod):
+        """Get the point indices kept by a level of detail as a slice (for a
+        stride) or a sorted array (for a random subset). The subset is seeded
+        so the same points are kept every timestep and every time the file
+        is opened.
+        """
+        mode, target = lod[:2]
+        if mode == 'stride':
+            stride = -(-self._npoints // max(target, 1))
+            return slice(0, self._npoints, stride)
+        if self._lod_index is not None and self._lod_index[0] == (lod, self._npoints):
+            return self._lod_index[1]
+        n = self._npoints
+        rng = np.random.RandomState(lod[2])
+        if target * 4 >= n:
+            index = rng.permutation(n)[:target]
+        else:
+            # Avoid a permutation of every point for small subsets
+            index = np.unique(rng.randint(0, n, size=2*target))
+            while len(index) < target:
+                index = np.union1d(index, rng.randint(0, n, size=target))
+            index = rng.permutation(index)[:target]
+        index.sort()
+        self._lod_index = ((lod, n), index)
+        return index
+
+    def _get_number_of_points(self):
+        """Get the number of points that are output across all pieces"""
+        lod = self._get_lod()
+        if lod is None:
+            return self._npoints
+        index = self._get_lod_index(lod)
+        if isinstance(index, slice):
+            return len(range(*index.indices(self._npoints)))
+        return len(index)
+
+    def _get_point_index(self, region):
+        """Get the point indices in the file of a region as a slice or a
+        sorted array.
+        """
+        if region is None:
+            return slice(None)
+        start, stop, lod = region
+        if lod is None:
+            return slice(start, stop)
+        index = self._get_lod_index(lod)
+        if isinstance(index, slice):
+            p0, _, step = index.indices(self._npoints)
+            return slice(p0 + start*step, p0 + stop*step, step)
+        return index[start:stop]
+
+    def _get_region(self):
+        """Get the ``(start, stop, lod)`` range of the points of the requested
+        piece within the level of detail or ``None`` for all of the points.
+        """
+        lod = self._get_lod()
+        if self._piece_range is None and lod is None:
+            return None
+        start, stop = self._piece_range or (0, self._get_number_of_points())
+        return (start, stop, lod)
+
+    def _take_region(self, name, arr, region):
+        """Take the points of a region from a timestep of a variable that has
+        been read in full.
+        """
+        if region is None:
+            return arr
+        return arr[self._get_point_index(region)]
+
+    def _set_piece(self, piece, npieces):
+        """Partition the output points into ``npieces`` contiguous index
+        ranges and only read the range of the given piece.
+        """
+        num = self._get_number_of_points()
+        if npieces < 2:
+            self._piece_range = None
+        else:
+            self._piece_range = (num * piece // npieces, num * (piece + 1) // npieces)
+        return self._piece_range
+
+
+    #### Getters/Setters ####
+
+    def set_lod_mode(self, mode):
+        """Set the level of detail mode: ``'none'`` outputs every point,
+        ``'stride'`` outputs every k-th point, and ``'random'`` outputs a
+        stable random subset of the points. Either way, only the kept points
+        are read. The mode can also be given by its index.
+        """
+        if not isinstance(mode, str):
+            mode = self._lod_modes[int(mode)]
+        if mode not in self._lod_modes:
+            raise _helpers.PVGeoError('Level of detail mode `%s` not understood.' % mode)
+        if self._lod_mode != mode:
+            self._lod_mode = mode
+            self.modified(read_again=False)
+
+    def set_lod_target(self, count):
+        """Set the number of points to output when using a level of detail"""
+        count = max(1, int(count))
+        if self._lod_target != count:
+            self._lod_target = count
+            self.modified(read_again=False)
+
+    def get_lod_mode(self):
+        """Returns the level of detail mode"""
+        return self._lod_mode
+
+    def get_lod_target(self):
+        """Returns the number of points output when using a level of detail"""
+        return self._lod_target
+
+    #### Output helpers ####
+
+    def _get_verts(self, num):
+        """Get a ``vtkCellArray`` of one vertex per point. This only depends
+        on the number of points so it is built once and reused across frames.
+        """
+        if self._verts is None or self._verts.GetNumberOfCells() != num:
+            cells = np.empty((num, 2), dtype=nps.ID_TYPE_CODE)
+            cells[:, 0] = 1
+            cells[:, 1] = np.arange(num)
+            self._verts = vtk.vtkCellArray()
+            self._verts.SetCells(num, nps.numpy_to_vtkIdTypeArray(cells.ravel(), deep=1))
+        return self._verts
+
+    def _points_to_poly_data(self, points, arrays, output):
+        """Populate a ``vtkPolyData`` with vertices at the given ``(n, 3)``
+        points and point data from the dictionary of attribute arrays. The
+        NumPy buffers are wrapped without copying.
+        """
+        with self._stage('to_vtk'):
+            pts = vtk.vtkPoints()
+            pts.SetData(self._to_vtk_array(points))
+            output.SetPoints(pts)
+            output.SetVerts(self._get_verts(len(points)))
+            self._add_arrays(output.GetPointData(), arrays)
+        return output
 
     #### Algorithm Methods ####
 
+    @profile_stage('RequestData')
     def RequestData(self, request, inInfo, outInfo):
         """Used by pipeline to get data for current timestep and populate the
         output data object. This assumes that ``self._get_raw_data()`` will return
-        a dataset ready for PVGeo's ``interface.points_to_poly_data()``.
+        the XYZ points as an ``(n, 3)`` array and a dictionary of attribute
+        arrays.
         """
         # Get output:
         output = self.GetOutputData(outInfo, 0)
@@ -150,9 +1648,19 @@ class netCDFPointsReaderBase(netCDFReaderBase):
         i = _helpers.get_requested_time(self, outInfo)
         if self.need_to_read():
             self._read_up_front()
+        # Only read the points of the requested piece
+        piece, npieces, _ = self._get_update_piece(outInfo)
+        self._set_piece(piece, npieces)
         # Get the data which has already been loaded
-        data = self._get_raw_data(idx=i) # these should just be XYZ+attribute
-        #   in either a numpy array or a pandas dataframe where first three
-        #   columns are the XYZ arrays
-        output.DeepCopy(interface.points_to_poly_data(data))
+        points, arrays = self._get_raw_data(idx=i)
+        self._points_to_poly_data(points, arrays, output)
+        return 1 # NOTE: ALWAYS return 1 on pipeline methods
+
+    def RequestInformation(self, request, inInfo, outInfo):
+        """Handles the timesteps and tells the pipeline that this reader can
+        split its points into pieces (one per MPI rank).
+        """
+        netCDFReaderBase.RequestInformation(self, request, inInfo, outInfo)
+        info = outInfo.GetInformationObject(0)
+        info.Set(vtk.vtkAlgorithm.CAN_HANDLE_PIECE_REQUEST(), 1)
         return 1 # NOTE: ALWAYS return 1 on pipeline methods
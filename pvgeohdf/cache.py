@@ -0,0 +1,271 @@
+"""This module provides a bounded timestep cache shared by the readers."""
+
+__all__ = [
+    'TimestepCache',
+]
+
+__displayname__ = 'Caching'
+
+import collections
+import threading
+import weakref
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue # Python 2
+
+import numpy as np
+
+
+def _nbytes(value):
+    """Approximate the number of bytes held by a cached value"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_nbytes(v) for v in value)
+    return getattr(value, 'nbytes', 0)
+
+
+def _weak_loader(loader):
+    """Get a callable returning a bound method loader (or ``None`` once its
+    object is gone) so queued prefetches do not keep a reader alive
+    """
+    obj = getattr(loader, '__self__', None)
+    if obj is None:
+        return lambda: loader
+    ref = weakref.ref(obj)
+    func = loader.__func__
+    def _get():
+        owner = ref()
+        return None if owner is None else func.__get__(owner, type(owner))
+    return _get
+
+
+def _stop_worker(tasks):
+    """Get a weak reference callback that stops the prefetch thread of a
+    cache once the cache is discarded
+    """
+    def _stop(ref):
+        tasks.put(None)
+    return _stop
+
+
+def _prefetch_worker(ref, tasks):
+    """Background worker: load queued keys until the cache is closed or
+    discarded. Only a weak reference to the cache is held between keys.
+    """
+    while True:
+        item = tasks.get()
+        cache = ref() if item is not None else None
+        try:
+            if cache is None:
+                return
+            cache._load_queued(*item)
+        finally:
+            tasks.task_done()
+        # Do not hold the cache or the loader while waiting for the next key
+        del cache, item
+
+
+class TimestepCache(object):
+    """A thread safe, least recently used cache of timestep data bounded by a
+    byte budget. Values are loaded through a callable on a miss and the next
+    few timesteps can be loaded ahead of time on a background thread so that
+    forward animation playback does not wait on I/O.
+
+    Args:
+        max_bytes (int): the byte budget for all cached values
+        prefetch (int): the number of timesteps to load ahead of a request
+    """
+    __displayname__ = 'Timestep Cache'
+    __category__ = 'base'
+    def __init__(self, max_bytes=512*1024**2, prefetch=2):
+        self._max_bytes = int(max_bytes)
+        self._prefetch = int(prefetch)
+        self._items = collections.OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.RLock()
+        # Keys currently being loaded mapped to an event set when done
+        self._pending = dict()
+        self._generation = 0
+        self._queue = None
+        self._worker = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    #### Cache management ####
+
+    def _evict(self):
+        """Drop the least recently used items until within the byte budget"""
+        while self._nbytes > self._max_bytes and len(self._items) > 0:
+            _, (_, nbytes) = self._items.popitem(last=False)
+            self._nbytes -= nbytes
+            self.evictions += 1
+
+    def put(self, key, value):
+        """Add a value to the cache. Values larger than the whole budget are
+        not cached."""
+        nbytes = _nbytes(value)
+        with self._lock:
+            if key in self._items:
+                self._nbytes -= self._items.pop(key)[1]
+            if nbytes > self._max_bytes:
+                return value
+            self._items[key] = (value, nbytes)
+            self._nbytes += nbytes
+            self._evict()
+        return value
+
+    def _lookup(self, key):
+        """Returns the cached value (marking it as recently used) or ``None``"""
+        with self._lock:
+            item = self._items.pop(key, None)
+            if item is None:
+                return None
+            self._items[key] = item
+            return item[0]
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, loader):
+        """Get a value from the cache, calling ``loader(key)`` on a miss. If
+        the key is currently being prefetched this waits on that load rather
+        than reading it twice.
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            event = self._pending.get(key, None)
+        if event is not None:
+            event.wait()
+            value = self._lookup(key)
+            if value is not None:
+                with self._lock:
+                    self.hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return self.put(key, loader(key))
+
+    def clear(self):
+        """Drop all cached values and discard any outstanding prefetches"""
+        with self._lock:
+            self._items.clear()
+            self._nbytes = 0
+            self._generation += 1
+        return self
+
+    def reset_stats(self):
+        """Reset the hit, miss, and eviction counters"""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+        return self
+
+    def get_stats(self):
+        """Returns a dictionary of the cache counters and current size"""
+        with self._lock:
+            return dict(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                items=len(self._items),
+                nbytes=self._nbytes,
+                max_bytes=self._max_bytes,
+            )
+
+    #### Prefetching ####
+
+    def _load_queued(self, generation, key, get_loader):
+        """Load a key queued for prefetching unless it went stale or the
+        object whose method loads it is gone
+        """
+        loader = get_loader()
+        with self._lock:
+            event = self._pending.get(key, None)
+            stale = loader is None or generation != self._generation or key in self._items
+        try:
+            if not stale:
+                value = loader(key)
+                with self._lock:
+                    if generation == self._generation:
+                        self.put(key, value)
+        except Exception: # Errors surface when the key is requested
+            pass
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            if event is not None:
+                event.set()
+        return
+
+    def prefetch(self, keys, loader):
+        """Queue keys to be loaded on the background thread. Keys already
+        cached or pending are skipped."""
+        if self._prefetch < 1:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._queue = queue.Queue()
+                # The thread only holds the cache weakly and is stopped when
+                # the cache is discarded
+                ref = weakref.ref(self, _stop_worker(self._queue))
+                self._worker = threading.Thread(target=_prefetch_worker, args=(ref, self._queue),
+                                                name='TimestepCachePrefetch')
+                self._worker.daemon = True
+                self._worker.start()
+            get_loader = _weak_loader(loader)
+            for key in keys:
+                if key in self._items or key in self._pending:
+                    continue
+                self._pending[key] = threading.Event()
+                self._queue.put((self._generation, key, get_loader))
+        return
+
+    def close(self):
+        """Stop the prefetch thread once the queued keys are done. It is
+        started again by the next prefetch.
+        """
+        with self._lock:
+            if self._worker is not None:
+                self._queue.put(None)
+                self._worker = None
+        return
+
+    def wait(self):
+        """Block until all queued prefetches have finished"""
+        if self._queue is not None:
+            self._queue.join()
+        return
+
+    #### Getters/Setters ####
+
+    def set_max_bytes(self, max_bytes):
+        """Set the byte budget, evicting items if needed"""
+        with self._lock:
+            self._max_bytes = int(max_bytes)
+            self._evict()
+
+    def get_max_bytes(self):
+        """Returns the byte budget"""
+        return self._max_bytes
+
+    def set_prefetch(self, n):
+        """Set the number of timesteps to load ahead of a request"""
+        self._prefetch = int(n)
+
+    def get_prefetch(self):
+        """Returns the number of timesteps loaded ahead of a request"""
+        return self._prefetch
@@ -0,0 +1,212 @@
+"""This module keeps the timesteps of arrays compressed in memory so that a
+whole run fits in RAM for instant scrubbing. Each timestep is compressed on
+its own with a fast codec after shuffling its bytes (grouping the n-th byte
+of every value), which is what makes smooth fields compress well. The
+codecs come from optional packages: ``blosc``, ``zstandard``, or ``lz4``,
+falling back to ``zlib`` from the standard library."""
+
+__all__ = [
+    'CompressedFrames',
+    'decompress_frames',
+    'get_codecs',
+]
+
+__displayname__ = 'Compression'
+
+import zlib
+
+import numpy as np
+
+try:
+    import blosc
+except ImportError:
+    blosc = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4frame
+except ImportError:
+    lz4frame = None
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    ThreadPoolExecutor = None # Python 2
+
+
+def _shuffle(arr):
+    """Group the n-th byte of every value of a contiguous array"""
+    itemsize = arr.dtype.itemsize
+    if itemsize == 1:
+        return arr.tobytes()
+    return arr.view(np.uint8).reshape((-1, itemsize)).T.tobytes()
+
+
+def _unshuffle(raw, dtype, shape):
+    """Undo ``_shuffle`` on the bytes of an array"""
+    itemsize = dtype.itemsize
+    arr = np.frombuffer(raw, dtype=np.uint8)
+    if itemsize > 1:
+        arr = arr.reshape((itemsize, -1)).T
+    return np.ascontiguousarray(arr).view(dtype).reshape(shape)
+
+
+class _Codec(object):
+    """A compressor of the bytes of arrays. ``blosc`` shuffles the bytes on
+    its own (and decompresses straight into a new array) while the others
+    compress the bytes from ``_shuffle``.
+    """
+    def __init__(self, name, compress, decompress, shuffles=False):
+        self.name = name
+        self._compress = compress
+        self._decompress = decompress
+        self._shuffles = shuffles
+
+    def encode(self, arr):
+        """Compress a contiguous array"""
+        if self._shuffles:
+            return self._compress(arr)
+        return self._compress(_shuffle(arr))
+
+    def decode(self, data, dtype, shape):
+        """Decompress an array encoded with ``encode``"""
+        if self._shuffles:
+            return self._decompress(data, dtype, shape)
+        return _unshuffle(self._decompress(data), dtype, shape)
+
+
+def _blosc_compress(arr):
+    return blosc.compress(arr.tobytes(), typesize=arr.dtype.itemsize, clevel=5,
+                          shuffle=blosc.SHUFFLE, cname='lz4')
+
+
+def _blosc_decompress(data, dtype, shape):
+    out = np.empty(shape, dtype=dtype)
+    blosc.decompress_ptr(data, out.__array_interface__['data'][0])
+    return out
+
+
+def _zstd_compress(raw):
+    # Compressors are not thread safe so each call makes its own
+    return zstandard.ZstdCompressor(level=3).compress(raw)
+
+
+def _zstd_decompress(data):
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+def _get_codec_table():
+    """Get the available codecs by name in the order they are preferred"""
+    codecs = []
+    if blosc is not None:
+        codecs.append(_Codec('blosc', _blosc_compress, _blosc_decompress, shuffles=True))
+    if zstandard is not None:
+        codecs.append(_Codec('zstd', _zstd_compress, _zstd_decompress))
+    if lz4frame is not None:
+        codecs.append(_Codec('lz4', lz4frame.compress, lz4frame.decompress))
+    codecs.append(_Codec('zlib', lambda raw: zlib.compress(raw, 1), zlib.decompress))
+    return codecs
+
+
+def get_codecs():
+    """Get the names of the codecs that are available, the preferred first"""
+    return [codec.name for codec in _get_codec_table()]
+
+
+def _get_codec(name='auto'):
+    """Get a codec by name or the preferred codec for ``'auto'``"""
+    codecs = _get_codec_table()
+    if name == 'auto':
+        return codecs[0]
+    for codec in codecs:
+        if codec.name == name:
+            return codec
+    raise ValueError('The %s codec is not available: use one of %s.' % (name, get_codecs()))
+
+
+class CompressedFrames(object):
+    """The timesteps of an array with each timestep compressed on its own.
+    Indexing by a timestep decompresses that timestep to a new contiguous
+    array. The codecs release the GIL so timesteps of several arrays can be
+    decompressed at once with ``decompress_frames``.
+
+    Args:
+        codec (str): the name of the codec or ``'auto'`` for the fastest
+            available one
+    """
+    __displayname__ = 'Compressed Frames'
+    __category__ = 'base'
+    def __init__(self, codec='auto'):
+        self._codec = _get_codec(codec)
+        self._frames = []
+        self.dtype = None
+        self.shape = None
+        # The bytes of the timesteps before and after compression
+        self.raw_nbytes = 0
+        self.nbytes = 0
+
+    @property
+    def codec(self):
+        """The name of the codec"""
+        return self._codec.name
+
+    def append(self, arr):
+        """Compress a timestep and add it to the end"""
+        arr = np.ascontiguousarray(arr)
+        if self.dtype is None:
+            self.dtype, self.shape = arr.dtype, arr.shape
+        elif arr.dtype != self.dtype or arr.shape != self.shape:
+            raise ValueError('All timesteps must have the same shape and dtype.')
+        data = self._codec.encode(arr)
+        self._frames.append(data)
+        self.raw_nbytes += arr.nbytes
+        self.nbytes += len(data)
+        return
+
+    def extend(self, block):
+        """Compress each timestep of a block whose first axis is time"""
+        for arr in block:
+            self.append(arr)
+        return
+
+    def get_ratio(self):
+        """Returns how many times smaller the timesteps are compressed"""
+        return self.raw_nbytes / float(max(1, self.nbytes))
+
+    def __len__(self):
+        return len(self._frames)
+
+    def __getitem__(self, idx):
+        return self._codec.decode(self._frames[idx], self.dtype, self.shape)
+
+
+def _make_pool(threads):
+    """Make a pool of threads to decompress on or return ``None`` when
+    decompressing on the calling thread
+    """
+    if ThreadPoolExecutor is None or threads < 2:
+        return None
+    return ThreadPoolExecutor(max_workers=threads)
+
+
+def decompress_frames(frames, idx, pool=None):
+    """Decompress a timestep of several ``CompressedFrames`` at once.
+
+    Args:
+        frames (dict): the ``CompressedFrames`` by name
+        idx (int): the timestep to decompress
+        pool (ThreadPoolExecutor): the threads to decompress on or ``None``
+            to decompress on this thread
+
+    Return:
+        dict: the decompressed timestep by name
+    """
+    names = list(frames.keys())
+    if pool is None or len(names) < 2:
+        return dict((name, frames[name][idx]) for name in names)
+    arrays = pool.map(lambda name: frames[name][idx], names)
+    return dict(zip(names, arrays))
@@ -0,0 +1,153 @@
+"""This module evaluates derived variables: NumPy expressions over the
+variables of a file (e.g. ``NO + NO2``) that the readers output like any
+other array. Only the variables an expression uses are read and each
+timestep is evaluated in chunks (with ``numexpr`` when it is installed) to
+limit the temporary arrays.
+
+Expressions may use arithmetic, comparisons, ``&``, ``|``, and ``~``, these
+functions: ``sqrt``, ``exp``, ``log``, ``log10``, ``abs``, ``sin``, ``cos``,
+``tan``, ``arcsin``, ``arccos``, ``arctan``, ``arctan2``, ``sinh``,
+``cosh``, ``tanh``, ``where``, ``minimum``, and ``maximum``, along with:
+
+- ``prev(name)``: the variable at the previous timestep
+- ``dt``: the time between the previous and current timestep
+"""
+
+__all__ = [
+    'DerivedVariable',
+    'parse_derived_variables',
+]
+
+__displayname__ = 'Derived Variables'
+
+import ast
+import re
+
+import numpy as np
+
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+
+# The functions that expressions may call
+_FUNCTIONS = {
+    'sqrt': np.sqrt, 'exp': np.exp, 'log': np.log, 'log10': np.log10,
+    'abs': np.abs, 'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
+    'arcsin': np.arcsin, 'arccos': np.arccos, 'arctan': np.arctan,
+    'arctan2': np.arctan2, 'sinh': np.sinh, 'cosh': np.cosh, 'tanh': np.tanh,
+    'where': np.where, 'minimum': np.minimum, 'maximum': np.maximum,
+}
+# The functions that ``numexpr`` also has
+_NUMEXPR_FUNCTIONS = set(_FUNCTIONS) - set(['minimum', 'maximum'])
+
+_PREV = re.compile(r'\bprev\(\s*([A-Za-z_]\w*)\s*\)')
+_PREV_PREFIX = 'prev__'
+
+# The syntax that expressions may use (numbers are ``Num`` before Python 3.8)
+_ALLOWED_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call,
+                  ast.Name, ast.Load, ast.operator, ast.unaryop, ast.cmpop) + \
+                 tuple(getattr(ast, n) for n in ('Constant', 'Num') if hasattr(ast, n))
+
+
+def parse_derived_variables(text):
+    """Parse ``name = expression`` definitions separated by new lines or
+    semicolons.
+
+    Return:
+        list(tuple(str)): the ``(name, expression)`` of each definition
+    """
+    definitions = []
+    for line in re.split(r'[;\n]', text or ''):
+        if not line.strip():
+            continue
+        if '=' not in line:
+            raise ValueError('Derived variables are defined as `name = expression`: %s' % line.strip())
+        name, expression = line.split('=', 1)
+        definitions.append((name.strip(), expression.strip()))
+    return definitions
+
+
+class DerivedVariable(object):
+    """A variable derived from the variables of a file by an expression.
+
+    Args:
+        name (str): the name of the output array
+        expression (str): the expression over the file variables
+    """
+    __displayname__ = 'Derived Variable'
+    __category__ = 'base'
+    # The most values evaluated at once without ``numexpr``
+    _chunk_size = 2**20
+    def __init__(self, name, expression):
+        self.name = name
+        self.expression = expression
+        self._text = _PREV.sub(lambda m: _PREV_PREFIX + m.group(1), expression)
+        try:
+            tree = ast.parse(self._text.strip(), mode='eval')
+        except SyntaxError as err:
+            raise ValueError('Unable to parse the expression of `%s`: %s' % (name, err))
+        names, functions = set(), set()
+        for node in ast.walk(tree):
+            if not isinstance(node, _ALLOWED_NODES):
+                raise ValueError('`%s` is not allowed in the expression of `%s`.'
+                                 % (type(node).__name__, name))
+            if isinstance(node, ast.Call):
+                if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCTIONS:
+                    raise ValueError('Unknown function in the expression of `%s`.' % name)
+                functions.add(node.func.id)
+            elif isinstance(node, ast.Name) and node.id not in _FUNCTIONS:
+                names.add(node.id)
+        self.uses_dt = 'dt' in names
+        names.discard('dt')
+        # The variables used at the current and the previous timestep
+        self.sources = sorted(n for n in names if not n.startswith(_PREV_PREFIX))
+        self.previous = sorted(n[len(_PREV_PREFIX):] for n in names if n.startswith(_PREV_PREFIX))
+        if len(self.sources) + len(self.previous) == 0:
+            raise ValueError('The expression of `%s` does not use any variables.' % name)
+        self._code = compile(tree, '<%s>' % name, 'eval')
+        self._numexpr = numexpr is not None and functions.issubset(_NUMEXPR_FUNCTIONS)
+
+    def get_sources(self):
+        """Get the names of every variable the expression uses"""
+        return sorted(set(self.sources) | set(self.previous))
+
+    def evaluate(self, arrays, previous=None, dt=0.0):
+        """Evaluate the expression for a timestep.
+
+        Args:
+            arrays (dict): the arrays of the variables at the timestep
+            previous (dict): the arrays of the variables at the previous
+                timestep or ``None`` to use the current timestep
+            dt (float or np.ndarray): the time since the previous timestep
+
+        Return:
+            np.ndarray: the derived array
+        """
+        if previous is None:
+            previous = arrays
+        local = dict((n, np.asarray(arrays[n])) for n in self.sources)
+        for n in self.previous:
+            local[_PREV_PREFIX + n] = np.asarray(previous[n])
+        if self.uses_dt:
+            local['dt'] = dt
+        if self._numexpr:
+            # ``numexpr`` works through the arrays in small blocks on its own
+            return numexpr.evaluate(self._text, local_dict=local)
+        shapes = set(v.shape for v in local.values() if np.ndim(v) > 0)
+        if len(shapes) != 1:
+            # Broadcast arrays cannot be split into matching chunks
+            return np.asarray(eval(self._code, {'__builtins__': {}}, dict(_FUNCTIONS, **local)))
+        shape = shapes.pop()
+        flat = dict((k, v.ravel() if np.ndim(v) > 0 else v) for k, v in local.items())
+        size = int(np.prod(shape))
+        out = None
+        for a in range(0, max(size, 1), self._chunk_size):
+            b = min(size, a + self._chunk_size)
+            chunk = dict((k, v[a:b] if np.ndim(v) > 0 else v) for k, v in flat.items())
+            result = np.broadcast_to(eval(self._code, {'__builtins__': {}}, dict(_FUNCTIONS, **chunk)), (b - a,))
+            if out is None:
+                out = np.empty(size, dtype=result.dtype)
+            out[a:b] = result
+        return out.reshape(shape)
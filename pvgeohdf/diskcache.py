@@ -0,0 +1,152 @@
+"""This module provides a persistent on-disk cache of converted arrays so that
+reopening a file that has already been viewed does not parse it again."""
+
+__all__ = [
+    'FrameDiskCache',
+]
+
+__displayname__ = 'Disk Caching'
+
+import hashlib
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+# Atomically move a file into place (``os.rename`` on Python 2)
+_replace = getattr(os, 'replace', os.rename)
+
+
+def _hash(value):
+    """Get a short, stable hex digest of the ``repr`` of a value"""
+    return hashlib.sha1(repr(value).encode('utf-8')).hexdigest()[:20]
+
+
+class FrameDiskCache(object):
+    """A directory of ``.npy`` files holding arrays that have been read and
+    converted for a file. Entries are grouped by a fingerprint of the file (its
+    path, size, and modification time) so they are never served for a file
+    that has changed. The total size of the directory is capped: once it goes
+    over the cap the least recently used entries are deleted down to a
+    fraction of the cap so the directory is not scanned on every write.
+
+    Args:
+        cache_dir (str): the directory to store the cache in
+        max_bytes (int): the largest total size of the cache on disk
+    """
+    __displayname__ = 'Frame Disk Cache'
+    __category__ = 'base'
+    # The fraction of the cap that a cleanup trims the cache down to
+    _low_water = 0.8
+    def __init__(self, cache_dir, max_bytes=10*1024**3):
+        self._cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+        self._max_bytes = int(max_bytes)
+        self._lock = threading.RLock()
+        if not os.path.isdir(self._cache_dir):
+            os.makedirs(self._cache_dir)
+        self._nbytes = sum(size for _, _, size in self._list_entries())
+
+    @staticmethod
+    def fingerprint(filename, *extra):
+        """Get the key of a file from its path, size, and modification time
+        along with anything else that changes how it is converted.
+        """
+        stat = os.stat(filename)
+        return _hash((os.path.abspath(filename), stat.st_size, stat.st_mtime) + extra)
+
+    def _get_path(self, fingerprint, key):
+        return os.path.join(self._cache_dir, fingerprint, _hash(key) + '.npy')
+
+    def _list_entries(self):
+        """Get ``(last_used, path, size)`` for every entry in the cache"""
+        entries = []
+        for root, _, files in os.walk(self._cache_dir):
+            for f in files:
+                if not f.endswith('.npy'):
+                    continue
+                path = os.path.join(root, f)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue # removed by another process
+                entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def get(self, fingerprint, key):
+        """Load an array from the cache or return ``None`` on a miss"""
+        path = self._get_path(fingerprint, key)
+        try:
+            arr = np.load(path, allow_pickle=False)
+        except (IOError, OSError, ValueError):
+            return None
+        try:
+            os.utime(path, None) # mark as recently used
+        except OSError:
+            pass
+        return arr
+
+    def put(self, fingerprint, key, arr):
+        """Save an array to the cache. The file is written under a temporary
+        name and then moved into place so readers never see a partial file.
+        """
+        path = self._get_path(fingerprint, key)
+        folder = os.path.dirname(path)
+        with self._lock:
+            try:
+                os.makedirs(folder)
+            except OSError:
+                pass # already exists
+            fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=folder)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.save(f, np.ascontiguousarray(arr), allow_pickle=False)
+                if os.path.exists(path):
+                    self._nbytes -= os.path.getsize(path)
+                _replace(tmp, path)
+            except (IOError, OSError):
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                return
+            self._nbytes += os.path.getsize(path)
+            if self._nbytes > self._max_bytes:
+                self.cleanup()
+        return
+
+    def cleanup(self):
+        """Delete the least recently used entries until the cache is under
+        ``_low_water`` of its size cap. Empty fingerprint directories are
+        removed as well.
+        """
+        with self._lock:
+            entries = sorted(self._list_entries())
+            total = sum(size for _, _, size in entries)
+            target = int(self._max_bytes * self._low_water)
+            for _, path, size in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+            for name in os.listdir(self._cache_dir):
+                folder = os.path.join(self._cache_dir, name)
+                if os.path.isdir(folder) and not os.listdir(folder):
+                    os.rmdir(folder)
+            self._nbytes = total
+        return
+
+    def get_cache_dir(self):
+        """Returns the directory of the cache"""
+        return self._cache_dir
+
+    def set_max_bytes(self, max_bytes):
+        """Set the size cap of the cache, deleting entries if needed"""
+        self._max_bytes = int(max_bytes)
+        if self._nbytes > self._max_bytes:
+            self.cleanup()
+
+    def get_nbytes(self):
+        """Returns the total size of the cache on disk"""
+        return self._nbytes
@@ -0,0 +1,142 @@
+"""This module handles time series that are split across several files."""
+
+__all__ = [
+    'FileIndex',
+    'FilePool',
+]
+
+__displayname__ = 'File Handling'
+
+import bisect
+import collections
+import threading
+
+
+class FileIndex(object):
+    """Maps a global time index to a file and the time index within that file
+    for files that are concatenated along time.
+
+    Args:
+        filenames (list(str)): the files in time order
+        lengths (list(int)): the number of timesteps in each file
+    """
+    __displayname__ = 'File Index'
+    __category__ = 'base'
+    def __init__(self, filenames, lengths):
+        if len(filenames) != len(lengths):
+            raise ValueError('A length is needed for each file.')
+        self.filenames = list(filenames)
+        self.lengths = [int(n) for n in lengths]
+        self._update_offsets()
+
+    def _update_offsets(self):
+        """Find the global index of the first timestep of each file"""
+        self.offsets = [0]
+        for n in self.lengths:
+            self.offsets.append(self.offsets[-1] + n)
+
+    def set_length(self, fi, length):
+        """Set the number of timesteps of a file (e.g. one that is still
+        being written). This shifts the global indices of every later file.
+        """
+        self.lengths[fi] = int(length)
+        self._update_offsets()
+
+    def __len__(self):
+        """The total number of timesteps"""
+        return self.offsets[-1]
+
+    def locate(self, idx):
+        """Get the ``(file_index, local_index)`` of a global time index"""
+        if idx < 0:
+            idx += len(self)
+        if idx < 0 or idx >= len(self):
+            raise IndexError('Time index %d out of range for %d timesteps.' % (idx, len(self)))
+        fi = bisect.bisect_right(self.offsets, idx) - 1
+        return fi, idx - self.offsets[fi]
+
+    def split(self, start, stop):
+        """Split the global ``[start, stop)`` range of timesteps by file.
+
+        Return:
+            list(tuple(int)): ``(file_index, local_start, local_stop)`` of each
+            file overlapping the range
+        """
+        ranges = []
+        for fi, (n, offset) in enumerate(zip(self.lengths, self.offsets)):
+            a, b = max(start, offset), min(stop, offset + n)
+            if b > a:
+                ranges.append((fi, a - offset, b - offset))
+        return ranges
+
+
+class FilePool(object):
+    """A bounded pool of open file handles. Handles are opened on first use
+    with ``opener(file_index)`` and the least recently used handle is closed
+    with ``closer(handle)`` when too many are open.
+
+    Args:
+        opener (callable): opens the handle of a file index
+        closer (callable): closes a handle
+        max_open (int): the most handles to keep open at once
+    """
+    __displayname__ = 'File Pool'
+    __category__ = 'base'
+    def __init__(self, opener, closer, max_open=16):
+        self._opener = opener
+        self._closer = closer
+        self._max_open = max(1, int(max_open))
+        self._handles = collections.OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, fi):
+        """Get the open handle of a file index, opening it if needed"""
+        with self._lock:
+            handle = self._handles.pop(fi, None)
+            if handle is None:
+                handle = self._opener(fi)
+            self._handles[fi] = handle
+            while len(self._handles) > self._max_open:
+                _, old = self._handles.popitem(last=False)
+                self._closer(old)
+            return handle
+
+    def add(self, fi, handle):
+        """Add a handle that is already open for a file index"""
+        with self._lock:
+            old = self._handles.pop(fi, None)
+            if old is not None and old is not handle:
+                self._closer(old)
+            self._handles[fi] = handle
+            while len(self._handles) > self._max_open:
+                _, old = self._handles.popitem(last=False)
+                self._closer(old)
+        return handle
+
+    def discard(self, fi):
+        """Close the handle of a file index if it is open"""
+        with self._lock:
+            handle = self._handles.pop(fi, None)
+            if handle is not None:
+                self._closer(handle)
+        return
+
+    def close(self):
+        """Close every open handle"""
+        with self._lock:
+            while len(self._handles) > 0:
+                _, handle = self._handles.popitem(last=False)
+                self._closer(handle)
+        return
+
+    def set_max_open(self, max_open):
+        """Set the most handles to keep open at once"""
+        with self._lock:
+            self._max_open = max(1, int(max_open))
+            while len(self._handles) > self._max_open:
+                _, old = self._handles.popitem(last=False)
+                self._closer(old)
+
+    def get_max_open(self):
+        """Returns the most handles kept open at once"""
+        return self._max_open
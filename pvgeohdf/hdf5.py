@@ -0,0 +1,219 @@
+"""These provide base classes for readers of plain HDF5 files through
+``h5py``. They follow the same contract as the netCDF base classes so
+readers only implement ``_read_up_front``, ``_read_block``, and
+``_get_raw_data``."""
+
+__all__ = [
+    'HDF5ReaderBase',
+    'HDF5PointsReaderBase',
+]
+
+__displayname__ = 'HDF5 Base Classes'
+
+import numpy as np
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+try:
+    from mpi4py import MPI
+except ImportError:
+    MPI = None
+
+from .base import _FileHandle, netCDFReaderBase, netCDFPointsReaderBase
+from .times import decode_cf_time
+
+
+def _get_attr(obj, name, default=None):
+    """Get an HDF5 attribute as a native string or value"""
+    value = obj.attrs.get(name, default)
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    if isinstance(value, np.ndarray) and value.size == 1:
+        value = value.ravel()[0]
+        if isinstance(value, bytes):
+            return value.decode('utf-8')
+    return value
+
+
+def _selection_shape(shape, key):
+    """Get the shape of the array selected by an index of integers and
+    slices into an array of the given shape. Integer indices drop their axis.
+    """
+    if not isinstance(key, tuple):
+        key = (key,)
+    if any(k is Ellipsis for k in key):
+        key = ()
+    out = []
+    for i, n in enumerate(shape):
+        k = key[i] if i < len(key) else slice(None)
+        if isinstance(k, slice):
+            out.append(len(range(*k.indices(n))))
+    return tuple(out)
+
+
+class HDF5ReaderBase(netCDFReaderBase):
+    """HDF5ReaderBase: reads plain HDF5 files (including ones that
+    ``netCDF4`` rejects) with ``h5py``. Variables are the paths of the
+    numeric datasets under a chosen group and each read goes straight into a
+    preallocated array with ``read_direct`` so there is no intermediate copy.
+    Files are still concatenated along time, cached, and prefetched like the
+    netCDF readers.
+    """
+    __displayname__ = 'HDF5 Reader Base'
+    __category__ = 'base'
+    extensions = 'h5 hdf5 he5 hdf'
+    # The size of the HDF5 chunk cache of each open file
+    _chunk_cache_bytes = 64*1024**2
+    def __init__(self, nOutputPorts=1, outputType='vtkPolyData', **kwargs):
+        netCDFReaderBase.__init__(self, nOutputPorts=nOutputPorts, outputType=outputType, **kwargs)
+        # Only datasets under this group are listed
+        self._group = kwargs.get('group', '/')
+
+    #### File reading methods ####
+
+    def _use_parallel_io(self):
+        """Returns ``True`` if files should be opened with the MPI-IO driver:
+        this must be requested, running on more than one MPI rank, and
+        ``h5py`` must be built with MPI support.
+        """
+        if not self._parallel_io or MPI is None or h5py is None:
+            return False
+        if MPI.COMM_WORLD.Get_size() < 2:
+            return False
+        return h5py.get_config().mpi
+
+    def _open_dataset(self, filename):
+        """Open an HDF5 file with ``h5py``, using the MPI-IO driver across the
+        MPI ranks when available. The chunk cache is shared by all of the
+        datasets in the file.
+        """
+        if h5py is None:
+            raise ImportError('h5py is needed to read HDF5 files: pip install pvgeohdf[hdf5]')
+        kwargs = dict(rdcc_nbytes=self._chunk_cache_bytes, rdcc_nslots=10007)
+        if self._use_parallel_io():
+            return h5py.File(filename, 'r', driver='mpio', comm=MPI.COMM_WORLD, **kwargs)
+        return h5py.File(filename, 'r', **kwargs)
+
+    def _open_handle(self, fi, dataset=None):
+        """Open the file at an index of the file index (or wrap its already
+        open file). Reads go through ``read_direct`` so the files are never
+        memory mapped.
+        """
+        filename = self._file_index.filenames[fi]
+        if dataset is None:
+            dataset = self._open_dataset(filename)
+        return _FileHandle(filename, dataset)
+
+    def _list_datasets(self, h5file=None):
+        """Get the full paths of the numeric datasets under the group in file
+        order that have a time axis. The ``time`` coordinate is not listed.
+        """
+        if h5file is None:
+            h5file = self._dataSet
+        time = self._find_time_dataset(h5file)
+        skip = time.name if time is not None else None
+        paths = []
+        def _visit(name, obj):
+            if isinstance(obj, h5py.Dataset) and obj.dtype.kind in 'biuf' and \
+                    obj.ndim > self._time_axis and obj.name != skip:
+                paths.append(obj.name)
+        h5file[self._group].visititems(_visit)
+        return paths
+
+    def _find_time_dataset(self, h5file, length=None):
+        """Get the 1D ``time`` dataset under the group with CF-convention
+        ``units`` (``<unit> since <date>``) or ``None``
+        """
+        group = h5file[self._group]
+        for name in ('time', 'Time', 'TIME'):
+            dset = group.get(name, None)
+            if not isinstance(dset, h5py.Dataset) or dset.ndim != 1:
+                continue
+            if length is not None and dset.shape[0] != length:
+                continue
+            if ' since ' in str(_get_attr(dset, 'units', '')):
+                return dset
+        return None
+
+    def _get_time_length(self, dataset):
+        """OVERRIDE: Get the number of timesteps in an open file. By default
+        this is the length of the ``time`` dataset or else the time axis of
+        the first listed dataset.
+        """
+        dset = self._find_time_dataset(dataset)
+        if dset is not None:
+            return dset.shape[0]
+        paths = self._list_datasets(dataset)
+        if len(paths) == 0:
+            raise RuntimeError('Unable to find any datasets under %s.' % self._group)
+        return dataset[paths[0]].shape[self._time_axis]
+
+    def _get_time_values(self, dataset, length):
+        """Decode the CF-convention ``time`` dataset (if any) to days since
+        1970-01-01.
+        """
+        dset = self._find_time_dataset(dataset, length=length)
+        if dset is None:
+            return None
+        calendar = _get_attr(dset, 'calendar', 'standard')
+        return decode_cf_time(dset[()], _get_attr(dset, 'units'), calendar=calendar)
+
+    def _get_variable(self, name):
+        """Get a dataset of the open file by its path"""
+        return self._dataSet[name]
+
+    def _get_read_dtype(self, name):
+        """Get the native dtype that a dataset of the open file is read as"""
+        return self._get_variable(name).dtype.newbyteorder('=')
+
+    def _read_variable(self, name, key=Ellipsis, out=None):
+        """Read a hyperslab of a dataset straight into a preallocated,
+        contiguous array in native byte order. Floating point values equal to
+        the ``_FillValue`` attribute become NaN.
+
+        Args:
+            name (str): the path of the dataset
+            key: the index/slices of the hyperslab to read
+            out (np.ndarray): a contiguous array with as many values as the
+                hyperslab to read into instead of a new array
+        """
+        with self._stage('read'):
+            dset = self._get_variable(name)
+            shape = _selection_shape(dset.shape, key)
+            if out is None:
+                out = np.empty(shape, dtype=dset.dtype.newbyteorder('='))
+            if out.size == 0:
+                return out
+            dset.read_direct(out.reshape(shape), source_sel=key if key is not Ellipsis else None)
+            fill = _get_attr(dset, '_FillValue')
+            if fill is not None and out.dtype.kind == 'f':
+                out[out == fill] = np.nan
+            if self._profiler is not None:
+                self._profiler.add_bytes_read(out.nbytes)
+            return out
+
+    #### Getters/Setters ####
+
+    def set_group(self, group):
+        """Set the path of the group whose datasets are listed"""
+        if self._group != group:
+            self._group = group
+            self.modified(read_again=True)
+
+    def get_group(self):
+        """Returns the path of the group whose datasets are listed"""
+        return self._group
+
+
+
+class HDF5PointsReaderBase(HDF5ReaderBase, netCDFPointsReaderBase):
+    """HDF5PointsReaderBase: for HDF5 files that will produce a
+    point+attribute dataset."""
+    __displayname__ = 'HDF5 Points Reader Base'
+    __category__ = 'base'
+    def __init__(self, nOutputPorts=1, outputType='vtkPolyData', **kwargs):
+        netCDFPointsReaderBase.__init__(self, nOutputPorts=nOutputPorts, outputType=outputType, **kwargs)
+        self._group = kwargs.get('group', '/')
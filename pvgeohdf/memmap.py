@@ -0,0 +1,156 @@
+"""This module memory maps variables that are stored as a plain block of bytes
+in a netCDF file so they can be sliced without going through ``netCDF4``."""
+
+__all__ = [
+    'MappedVariable',
+    'map_variables',
+]
+
+__displayname__ = 'Memory Mapping'
+
+import numpy as np
+import netCDF4
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+try:
+    from scipy.io import netcdf_file
+except ImportError:
+    netcdf_file = None
+
+
+# Attributes that make ``netCDF4`` transform the stored values
+_TRANSFORM_ATTRIBUTES = ('scale_factor', 'add_offset', 'missing_value',
+                         'valid_min', 'valid_max', 'valid_range', '_Unsigned')
+
+
+def _is_mappable(variable):
+    """Returns ``True`` if the stored values of a ``netCDF4.Variable`` are the
+    values ``netCDF4`` would return, other than fill values."""
+    try:
+        kind = np.dtype(variable.dtype).kind
+    except TypeError:
+        return False # variable length types
+    if kind not in 'biuf':
+        return False
+    attrs = variable.ncattrs()
+    return not any(a in attrs for a in _TRANSFORM_ATTRIBUTES)
+
+
+def _get_fill_value(variable):
+    """Get the value that ``netCDF4`` masks for a floating point variable"""
+    if '_FillValue' in variable.ncattrs():
+        return variable.getncattr('_FillValue')
+    return netCDF4.default_fillvals[np.dtype(variable.dtype).str[1:]]
+
+
+def _fill_nan(arr, fill_value):
+    """Replace the fill values of a floating point array with NaN. The array
+    is changed in place when it is writable.
+    """
+    if fill_value is None or arr.dtype.kind != 'f':
+        return arr
+    mask = arr == fill_value
+    if mask.any():
+        if arr.flags.writeable:
+            arr[mask] = np.nan
+        else:
+            arr = np.where(mask, np.nan, arr).astype(arr.dtype, copy=False)
+    return arr
+
+
+class MappedVariable(object):
+    """A memory mapped variable that is sliced like a ``netCDF4.Variable``.
+    Slices are converted to native byte order and masked fill values become
+    NaN (for floating point data) to match what the readers get from
+    ``netCDF4``. Slices of native byte order data without fill values are
+    views of the map so the OS pages them in on demand.
+
+    Args:
+        data (np.ndarray): the memory mapped array
+        fill_value: the fill value to replace with NaN or ``None``
+    """
+    __displayname__ = 'Mapped Variable'
+    __category__ = 'base'
+    def __init__(self, data, fill_value=None):
+        self.data = data
+        self.fill_value = fill_value
+        self.shape = data.shape
+        self.dtype = data.dtype.newbyteorder('=')
+
+    def __getitem__(self, key):
+        arr = self.data[key]
+        if not arr.dtype.isnative:
+            arr = arr.astype(self.dtype)
+        return _fill_nan(arr, self.fill_value)
+
+
+def _map_netcdf3(filename, dataset):
+    """Memory map the variables of a classic (or 64-bit offset) netCDF-3
+    file. Record variables are strided views across the records."""
+    if netcdf_file is None:
+        return dict(), None
+    ncfile = netcdf_file(filename, mode='r', mmap=True, maskandscale=False)
+    maps = dict()
+    for name, variable in dataset.variables.items():
+        if name not in ncfile.variables or not _is_mappable(variable):
+            continue
+        fill = _get_fill_value(variable) if variable.dtype.kind == 'f' else None
+        maps[name] = MappedVariable(ncfile.variables[name].data, fill_value=fill)
+    return maps, ncfile
+
+
+def _map_netcdf4(filename, dataset):
+    """Memory map the contiguous, unfiltered variables in the root group of a
+    netCDF4 (HDF5) file at their offsets in the file."""
+    if h5py is None:
+        return dict(), None
+    maps = dict()
+    try:
+        f = h5py.File(filename, 'r')
+    except (OSError, IOError, ValueError):
+        # ``netCDF4`` already holds the file open and a shared libhdf5 may
+        # refuse a second open so read through ``netCDF4`` instead
+        return dict(), None
+    with f:
+        for name, variable in dataset.variables.items():
+            if variable.chunking() != 'contiguous' or not _is_mappable(variable):
+                continue
+            if any(v for k, v in (variable.filters() or dict()).items() if k != 'complevel'):
+                continue
+            if name not in f:
+                continue
+            dset = f[name]
+            offset = dset.id.get_offset()
+            if offset is None or dset.size == 0:
+                continue # storage has not been allocated
+            data = np.memmap(filename, dtype=dset.dtype, mode='r', offset=offset, shape=dset.shape)
+            fill = _get_fill_value(variable) if variable.dtype.kind == 'f' else None
+            maps[name] = MappedVariable(data, fill_value=fill)
+    return maps, None
+
+
+def map_variables(filename, dataset):
+    """Memory map the variables of an open netCDF file that are stored as a
+    plain block of bytes: every fixed size and record variable of netCDF-3
+    classic and 64-bit offset files and the contiguous, uncompressed variables
+    of netCDF4 files (which needs ``h5py``). Variables whose values
+    ``netCDF4`` would scale or mask beyond the fill value are not mapped.
+
+    Args:
+        filename (str): the path of the file
+        dataset (netCDF4.Dataset): the file opened with ``netCDF4``
+
+    Return:
+        tuple: a dictionary of ``MappedVariable`` by variable name and an
+        object that owns the maps (or ``None``) to close with the dataset
+    """
+    model = dataset.data_model
+    if model in ('NETCDF3_CLASSIC', 'NETCDF3_64BIT_OFFSET', 'NETCDF3_64BIT'):
+        return _map_netcdf3(filename, dataset)
+    if model in ('NETCDF4', 'NETCDF4_CLASSIC'):
+        return _map_netcdf4(filename, dataset)
+    return dict(), None
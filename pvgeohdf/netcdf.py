@@ -3,23 +3,27 @@
 __all__ = [
     'SVCParcelReader',
     'CMAQReader',
+    'GriddedPointsReader',
 ]
 
 __displayname__ = 'netCDF I/O'
 
 
+import collections
+
 import numpy as np
-import pandas as pd
 import netCDF4
 import vtk
+from vtk.util import numpy_support as nps
 
 # Import PVGeo helpers:
 from PVGeo.base import ReaderBaseBase
 from PVGeo import _helpers
-from PVGeo import interface
 
 # Import internal helpers:
 from .base import netCDFPointsReaderBase, netCDFReaderBase
+from .profiling import profile_stage
+from .times import decode_tflag, find_time_variable
 
 
 ###############################################################################
@@ -29,16 +33,27 @@ class SVCParcelReader(netCDFPointsReaderBase):
     """SVCParcelReader for Kelton"""
     __displayname__ = 'SVC Parcel Reader'
     __category__ = 'reader'
+    # Variables are shaped ``(num_parcels, time)``
+    _time_axis = 1
+    # The size of the blocks of parcels read when transposing to time major
+    _block_bytes = 32*1024**2
     def __init__(self, **kwargs):
         netCDFPointsReaderBase.__init__(self, nOutputPorts=1, outputType='vtkPolyData', **kwargs)
         self._dataName = kwargs.get('name', 'Data')
+        self._poskeys = ["parcel_x_pos", "parcel_y_pos", "parcel_z_pos"]
+        # Output each parcel's path over a window of timesteps as a line
+        self._trajectories = kwargs.get('trajectories', False)
+        # The number of timesteps in the window (0 for all up to now)
+        self._trajectory_length = kwargs.get('trajectory_length', 0)
+        self._lines = None
 
     #### File reading methods ####
 
 
+    @profile_stage('read_up_front')
     def _read_up_front(self):
-        """This parses the loaded dataset to a NumPy ndarray. The first axis
-        represents a time step in the model space.
+        """This parses the dimensions and variable names of the loaded
+        dataset and updates the array selection.
         """
         # Perform Read
         self._get_file_contents()
@@ -46,57 +61,267 @@ class SVCParcelReader(netCDFPointsReaderBase):
         ###############################################
         # TODO: this needs to be generalized for any array names
         # Allow this to be chosen by user:
-        poskeys = ["parcel_x_pos", "parcel_y_pos", "parcel_z_pos"]
+        poskeys = self._poskeys
         ###############################
         x_pos2 = self._dataSet.variables[poskeys[0]]
-        y_pos2 = self._dataSet.variables[poskeys[1]]
-        z_pos2 = self._dataSet.variables[poskeys[2]]
+        # NOTE: the time values were decoded with the file index
+        self._npoints = x_pos2.shape[0]
 
-        tshape = x_pos2.shape[1]
-        num = x_pos2.shape[0]
-        self._timesteps = [i for i in range(tshape)]
+        # Now get the names of the rest of the parcel data: coordinate
+        # variables such as ``time`` are not shaped like the positions
+        self._keys = [k for k, v in self._dataSet.variables.items()
+                      if k not in poskeys and v.dimensions == x_pos2.dimensions]
 
-        # Now get the rest of the data
-        self._keys = list(self._dataSet.variables.keys())
-        dataArrs = dict()
-        for k in list(self._dataSet.variables.keys()):
-            if k not in poskeys:
-                dataArrs.setdefault(k, self._dataSet.variables[k])
-        nAtts = len(dataArrs.keys())
-
-        # 3D array where first axis is time
-        # and second-third axii are basically a table of XYZ+attributes
-        self._data = np.zeros((tshape, num, 3 + nAtts))
-        # Add the XYZ points first by convention for PVGeo
-        self._data[:, :, 0] = np.array(x_pos2).swapaxes(0,1)
-        self._data[:, :, 1] = np.array(y_pos2).swapaxes(0,1)
-        self._data[:, :, 2] = np.array(z_pos2).swapaxes(0,1)
-        # Now append all the data arrays
-        i = 3
-        self._keys = []
-        for name, d in dataArrs.items():
-            self._data[:, :, i] = np.array(d).swapaxes(0,1)
-            self._keys.append(name)
-            i += 1
+        self._update_array_selection()
+
+        # Data is only read for the selected arrays in ``_get_raw_data``:
+        # either a timestep at a time when lazy or else a whole variable
+        self._data = None
         # Mark as read
         self.need_to_read(flag=False)
         return 1
 
+    def _get_time_length(self, dataset):
+        """Get the number of timesteps in an open file"""
+        return dataset.variables[self._poskeys[0]].shape[self._time_axis]
 
-    def _get_raw_data(self, idx=0):
-        """Get the Points as numpy ndarrays or pandas dataframe where first three
-        columns are the XYZ coordinates
+    def _has_variable(self, name):
+        """The position variables can also be read (e.g. by derived
+        variables)
         """
-        # Get the time step then make a data frame
-        data = self._data[idx, :, :]
-        names = ["X", "Y", "Z"] + self._keys
-        df = pd.DataFrame(data=data, columns=names)
-        return df
+        return name in self._keys or name in self._poskeys
+
+    def _get_source_names(self, name):
+        """The points are read from the three position variables"""
+        if name == self._points_key:
+            return list(self._poskeys)
+        return [name]
 
+    def _get_key(self, name, time, region=None):
+        """Get the ``[start:stop, time]`` index of the span of the parcels in
+        the region
+        """
+        index = self._get_point_index(region)
+        if not isinstance(index, slice):
+            index = slice(int(index[0]), int(index[-1]) + 1) if len(index) else slice(0, 0)
+        return (index, time)
+
+    def _iter_parcel_blocks(self, name, index, start, stop, step=1):
+        """Read the ``[index, start:stop:step]`` parcels and timesteps of a
+        variable in blocks of parcels. Blocks span about ``self._block_bytes``
+        of the file and follow the chunk boundaries along the parcel axis so
+        chunks are not decompressed twice. Yields the range of each block in
+        the output and its data.
+
+        Args:
+            index (slice or np.ndarray): the parcels to read as a slice or a
+                sorted array of indices
+        """
+        planner = self._get_planner(name)
+        nt = len(range(start, stop, step))
+        tkey = slice(start, stop, step)
+        rows = max(1, self._block_bytes // max(nt * planner.itemsize, 1))
+        if planner.chunked:
+            size = planner.chunks[0]
+            rows = max(size, (rows // size) * size)
+        stride = None
+        if isinstance(index, slice):
+            p0, p1, stride = index.indices(self._npoints)
+            index = np.arange(p0, p1, stride)
+        if len(index) == 0:
+            return
+        # Split the parcels at the block edges in the file
+        edges = np.arange((index[0] // rows + 1) * rows, index[-1] + 1, rows)
+        splits = [0] + np.searchsorted(index, edges).tolist() + [len(index)]
+        for o0, o1 in zip(splits[:-1], splits[1:]):
+            if o1 <= o0:
+                continue
+            sel = index[o0:o1]
+            a, b = int(sel[0]), int(sel[-1]) + 1
+            if stride is not None:
+                block = self._read_variable(name, (slice(a, b, stride), tkey))
+            elif name in self._handle.memmaps:
+                # Only the pages of the chosen parcels are touched
+                block = self._read_variable(name, (sel, tkey))
+            else:
+                # Chunks are read whole so read the span and pick the parcels
+                block = self._read_variable(name, (slice(a, b), tkey))[sel - a]
+            yield o0, o1, block
+
+    def _read_block(self, name, start, stop, region=None, step=1):
+        """Reads every ``step``-th timestep of ``[start, stop)`` of a variable
+        in the native dtype of the file as a contiguous array where the first
+        axis is time so that each timestep can be handed to VTK without a
+        copy. The points are read as a ``(time, n, 3)`` array. Only the
+        parcels in the region (and level of detail) are read.
+
+        The file stores each parcel's timesteps together so this reads blocks
+        of parcels and transposes each block into place rather than swapping
+        the axes of the whole variable. This bounds the temporary memory to a
+        single block.
+        """
+        index = self._get_point_index(region)
+        if isinstance(index, slice):
+            num = len(range(*index.indices(self._npoints)))
+        else:
+            num = len(index)
+        nt = len(range(start, stop, step))
+        names = self._get_source_names(name)
+        out = None
+        for j, k in enumerate(names):
+            for o0, o1, block in self._iter_parcel_blocks(k, index, start, stop, step=step):
+                if out is None:
+                    shape = (nt, num, 3) if name == self._points_key else (nt, num)
+                    out = np.empty(shape, dtype=block.dtype)
+                if name == self._points_key:
+                    out[:, o0:o1, j] = block.T
+                else:
+                    out[:, o0:o1] = block.T
+        if out is None:
+            # No parcels in this region
+            shape = (nt, 0, 3) if name == self._points_key else (nt, 0)
+            out = np.empty(shape, dtype=self._get_variable(names[0]).dtype)
+        return out
+
+
+    def _get_trajectories(self, idx):
+        """Read the positions and selected variables of the parcels in the
+        region over the window of timesteps ending at timestep ``idx``. Each
+        parcel's timesteps are stored together in the file so blocks of
+        parcels are read straight into place in the output without a
+        transpose or a second copy of the window.
+
+        Return:
+            tuple: the ``(n*nt, 3)`` points where each parcel's ``nt`` points
+            are consecutive, an ordered dictionary of the ``(n*nt,)``
+            attribute arrays, and ``nt``
+        """
+        step = self._time_stride
+        first = 0 if self._trajectory_length <= 0 else max(0, idx - self._trajectory_length + 1)
+        start, stop = self._get_time_index(first), self._get_time_index(idx) + 1
+        nt = len(range(start, stop, step))
+        index = self._get_point_index(self._get_region())
+        if isinstance(index, slice):
+            num = len(range(*index.indices(self._npoints)))
+        else:
+            num = len(index)
+        selected = self.get_selected_arrays()
+        sources, derived = self._split_derived(selected)
+        names = [self._points_key] + sources
+        out = collections.OrderedDict()
+        for fi, a, b, pos in self._split_time_range(start, stop, step):
+            with self._use_file(fi):
+                for name in names:
+                    for j, k in enumerate(self._get_source_names(name)):
+                        for o0, o1, block in self._iter_parcel_blocks(k, index, a, b, step=step):
+                            if name not in out:
+                                shape = (num, nt, 3) if name == self._points_key else (num, nt)
+                                out[name] = np.empty(shape, dtype=block.dtype)
+                            if name == self._points_key:
+                                out[name][o0:o1, pos:pos + block.shape[1], j] = block
+                            else:
+                                out[name][o0:o1, pos:pos + block.shape[1]] = block
+        for name in names:
+            if name not in out:
+                # No parcels in this region
+                shape = (0, 3) if name == self._points_key else (0,)
+                out[name] = np.empty(shape, dtype=self._get_variable(self._get_source_names(name)[0]).dtype)
+            elif name == self._points_key:
+                out[name] = out[name].reshape((-1, 3))
+            else:
+                out[name] = out[name].ravel()
+        points = out.pop(self._points_key)
+        if len(derived):
+            out = self._derive_trajectories(out, derived, first, nt)
+        return points, collections.OrderedDict((name, out[name]) for name in selected), nt
+
+    def _derive_trajectories(self, arrays, derived, first, nt):
+        """Evaluate derived variables over the window of timesteps starting
+        at the exposed timestep ``first``. ``prev()`` is each parcel's
+        previous timestep in the window.
+        """
+        # Each parcel's timesteps are consecutive
+        window = dict((name, arr.reshape((-1, nt))) for name, arr in arrays.items())
+        prev_names = set(n for d in derived for n in d.previous)
+        previous = None
+        if len(prev_names):
+            previous = dict((n, np.concatenate([window[n][:, :1], window[n][:, :-1]], axis=1))
+                            for n in prev_names)
+        dt = np.array([self._get_time_delta(first + i) for i in range(nt)])
+        with self._stage('derive'):
+            for d in derived:
+                arr = d.evaluate(window, previous=previous, dt=dt)
+                arrays[d.name] = np.ascontiguousarray(arr).ravel()
+        return arrays
+
+    def _get_lines(self, num, nt):
+        """Get a ``vtkCellArray`` of ``num`` polylines of ``nt`` consecutive
+        points each. The offsets and connectivity are built with NumPy and the
+        cells are reused until the shape changes.
+        """
+        if self._lines is None or self._lines[0] != (num, nt):
+            offsets = np.arange(0, num*nt + 1, max(nt, 1), dtype=nps.ID_TYPE_CODE)
+            connectivity = np.arange(num*nt, dtype=nps.ID_TYPE_CODE)
+            lines = vtk.vtkCellArray()
+            if hasattr(lines, 'SetData'):
+                lines.SetData(nps.numpy_to_vtkIdTypeArray(offsets, deep=1),
+                              nps.numpy_to_vtkIdTypeArray(connectivity, deep=1))
+            else:
+                # Legacy ``[n, id0, id1, ...]`` layout before VTK 9
+                cells = np.empty((num, nt + 1), dtype=nps.ID_TYPE_CODE)
+                cells[:, 0] = nt
+                cells[:, 1:] = connectivity.reshape((num, nt))
+                lines.SetCells(num, nps.numpy_to_vtkIdTypeArray(cells.ravel(), deep=1))
+            self._lines = ((num, nt), lines)
+        return self._lines[1]
+
+    #### Algorithm Methods ####
+
+    @profile_stage('RequestData')
+    def RequestData(self, request, inInfo, outInfo):
+        """Outputs the parcels at the current timestep as vertices or, in
+        trajectory mode, the path of each parcel over the window of timesteps
+        ending at the current timestep as a polyline.
+        """
+        if not self._trajectories:
+            return netCDFPointsReaderBase.RequestData(self, request, inInfo, outInfo)
+        # Get output:
+        output = self.GetOutputData(outInfo, 0)
+        # Get requested time index
+        i = _helpers.get_requested_time(self, outInfo)
+        if self.need_to_read():
+            self._read_up_front()
+        # Only read the parcels of the requested piece
+        piece, npieces, _ = self._get_update_piece(outInfo)
+        self._set_piece(piece, npieces)
+        points, arrays, nt = self._get_trajectories(i)
+        pts = vtk.vtkPoints()
+        pts.SetData(self._to_vtk_array(points))
+        output.SetPoints(pts)
+        output.SetLines(self._get_lines(len(points) // max(nt, 1), nt))
+        self._add_arrays(output.GetPointData(), arrays)
+        return 1 # NOTE: ALWAYS return 1 on pipeline methods
 
 
     #### Getters/Setters ####
 
+    def set_trajectories(self, flag):
+        """Set whether to output the path of each parcel over a window of
+        timesteps as a polyline instead of the parcels at a single timestep
+        """
+        if self._trajectories != flag:
+            self._trajectories = flag
+            self.modified(read_again=False)
+
+    def set_trajectory_length(self, n):
+        """Set the number of timesteps in the window of the trajectories
+        ending at the current timestep. Use 0 for every timestep up to the
+        current timestep.
+        """
+        if self._trajectory_length != n:
+            self._trajectory_length = n
+            self.modified(read_again=False)
+
     def set_data_name(self, name):
         """This is an example of how to set a property for this reader to use.
         Note that we do not use this property.
@@ -114,60 +339,150 @@ class CMAQReader(netCDFReaderBase):
     """CMAQ read for Ziwei Wu"""
     __displayname__ = 'CMAQ Reader'
     __category__ = 'reader'
+    # The most bytes read at once when reading into a preallocated array
+    _block_bytes = 32*1024**2
     def __init__(self, **kwargs):
         netCDFReaderBase.__init__(self, nOutputPorts=1, outputType='vtkImageData', **kwargs)
         self.__shp = None
+        self.__update_extent = None
         self.__spacing = [1.0, 1.0, 1.0]
         self.__origin = [0.0, 0.0, 0.0]
 
     #### File reading methods ####
 
 
+    @profile_stage('read_up_front')
     def _read_up_front(self):
-        """This parses the loaded dataset to a NumPy ndarray. The first axis
-        represents a time step in the model space.
+        """This parses the dimensions and variable names of the loaded
+        dataset and updates the array selection.
         """
-        # Perform Read
+        # Perform Read: this also decodes the time values from TFLAG
         self._get_file_contents()
-        # Set up time shape
-        tflag = self._dataSet.variables['TFLAG']
-        tshape = tflag.shape[0]
-        # TODO: actually use the time step values from the data file
-        self._timesteps = [i for i in range(tshape)]
 
         # Now get the rest of the data
         self._keys = list(self._dataSet.variables.keys())
         self._keys.remove('TFLAG') # Remove tflag in place
-        dataArrs = dict()
         self.__shp = self._dataSet.variables[self._keys[0]].shape
-        num = self.__shp[1] * self.__shp[2] * self.__shp[3]
         for k in self._keys:
-            d = np.array(self._dataSet.variables[k])
-            # Swap the axis
-            dataArrs.setdefault(k, d.reshape((tshape, -1)))
-            if d.shape != self.__shp:
+            if self._dataSet.variables[k].shape != self.__shp:
                 raise RuntimeError('Dimension mismatch in the dataset')
-        nAtts = len(dataArrs.keys())
-
-        # 3D array where first axis is time
-        # and second-third axii are basically a table of the flattened attributes
-        self._data = np.zeros((tshape, num, nAtts))
-        # Now append all the data arrays
-        for i, k in enumerate(self._keys):
-            self._data[:, :, i] = np.array(dataArrs[k])
+
+        self._update_array_selection()
+
+        # Data is only read for the selected arrays in ``_get_raw_data``:
+        # either a timestep at a time when lazy or else a whole variable
+        self._data = None
         # Mark as read
         self.need_to_read(flag=False)
         return 1
 
+    def _get_time_length(self, dataset):
+        """Get the number of timesteps in an open file"""
+        return dataset.variables['TFLAG'].shape[0]
 
+    def _get_time_values(self, dataset, length):
+        """Decode the ``[YYYYDDD, HHMMSS]`` pairs of TFLAG to days since
+        1970-01-01.
+        """
+        return decode_tflag(dataset.variables['TFLAG'][:])
+
+    def _region_slices(self, region):
+        """Get the ``(z, y, x)`` slices of the cells in an update extent"""
+        if region is None:
+            return (slice(None), slice(None), slice(None))
+        x0, x1, y0, y1, z0, z1 = region
+        return (slice(z0, z1), slice(y0, y1), slice(x0, x1))
+
+    def _get_region(self):
+        """Get the requested update extent or ``None`` for the whole extent"""
+        ext = self.__update_extent
+        if ext is None or ext == self.get_extent():
+            return None
+        return ext
+
+    def _get_key(self, name, time, region=None):
+        """Get the ``[time, z0:z1, y0:y1, x0:x1]`` index of the region"""
+        return (time,) + self._region_slices(region)
+
+    def _take_region(self, name, arr, region):
+        """Take the cells of an update extent from a flattened timestep of a
+        variable that has been read in full.
+        """
+        if region is None:
+            return arr
+        nz, ny, nx = self.__shp[1::]
+        return np.ascontiguousarray(arr.reshape((nz, ny, nx))[self._region_slices(region)]).ravel()
+
+    def _read_block(self, name, start, stop, region=None, step=1, out=None):
+        """Reads every ``step``-th timestep of ``[start, stop)`` of a variable
+        as a contiguous 2D array where the first axis is time and the second
+        is the flattened grid so each timestep is a view that can be handed to
+        VTK without a copy. Arrays keep the native dtype of the file. Only the cells in the
+        region are read. When given ``out``, the timesteps are read straight
+        into it a few at a time so only one small block is ever held twice.
+        """
+        nt = len(range(start, stop, step))
+        if out is None:
+            key = self._get_key(name, slice(start, stop, step), region)
+            return self._read_variable(name, key).reshape((nt, -1))
+        rows = max(1, self._block_bytes // max(out[0:1].nbytes, 1))
+        for i in range(0, nt, rows):
+            j = min(nt, i + rows)
+            t0 = start + i * step
+            key = self._get_key(name, slice(t0, start + (j - 1) * step + 1, step), region)
+            self._read_variable(name, key, out=out[i:j])
+        return out
+
+    def _allocate_all(self, name, total, region=None):
+        """Allocate the 2D array that every timestep of a variable is read into
+        using the dimensions from the metadata. Variables whose values are
+        transformed on read (e.g. scaled) are stacked as they are read.
+        """
+        dtype = self._get_read_dtype(name)
+        if dtype is None:
+            return None
+        if region is None:
+            ncells = int(np.prod(self.__shp[1::]))
+        else:
+            x0, x1, y0, y1, z0, z1 = region
+            ncells = (x1 - x0) * (y1 - y0) * (z1 - z0)
+        return np.empty((total, ncells), dtype=dtype)
+
+
+    @profile_stage('get_raw_data')
     def _get_raw_data(self, idx=0):
-        """Get the Points as numpy ndarrays or pandas dataframe where first three
-        columns are the XYZ coordinates
+        """Get an ordered dictionary of the contiguous, flattened attribute
+        arrays for the selected variables at the timestep.
+        """
+        return self._get_arrays(idx)
+
+    def _get_piece_extent(self, piece, npieces, ghosts=0):
+        """Split the whole extent into ``npieces`` blocks and get the extent of
+        the given piece padded by the ghost levels along with the extent of
+        the piece without ghost levels.
         """
-        # Get the time step then make a data frame
-        data = self._data[idx, :, :]
-        df = pd.DataFrame(data=data, columns=self._keys)
-        return df
+        translator = vtk.vtkExtentTranslator()
+        translator.SetWholeExtent(self.get_extent())
+        translator.SetPiece(piece)
+        translator.SetNumberOfPieces(npieces)
+        translator.SetGhostLevel(0)
+        translator.PieceToExtent()
+        core = tuple(translator.GetExtent())
+        translator.SetGhostLevel(ghosts)
+        translator.PieceToExtent()
+        return tuple(translator.GetExtent()), core
+
+    @staticmethod
+    def _get_ghost_cells(ext, core):
+        """Get a flattened ``vtkGhostType`` array marking the cells of the
+        extent that are outside of the core extent as duplicate cells.
+        """
+        nx, ny, nz = ext[1] - ext[0], ext[3] - ext[2], ext[5] - ext[4]
+        ghost = np.full((nz, ny, nx), vtk.vtkDataSetAttributes.DUPLICATECELL, dtype=np.uint8)
+        ghost[core[4]-ext[4]:core[5]-ext[4],
+              core[2]-ext[2]:core[3]-ext[2],
+              core[0]-ext[0]:core[1]-ext[0]] = 0
+        return ghost.ravel()
 
     def get_extent(self, dim=False):
         if self.__shp is None:
@@ -180,10 +495,11 @@ class CMAQReader(netCDFReaderBase):
 
     #### Algorithm Methods ####
 
+    @profile_stage('RequestData')
     def RequestData(self, request, inInfo, outInfo):
         """Used by pipeline to get data for current timestep and populate the
-        output data object. This assumes that ``self._get_raw_data()`` will return
-        a dataset ready for PVGeo's ``interface.points_to_poly_data()``.
+        output data object. The cell data arrays wrap the NumPy buffers
+        returned by ``self._get_raw_data()`` without copying.
         """
         # Get output:
         output = self.GetOutputData(outInfo, 0)
@@ -191,22 +507,29 @@ class CMAQReader(netCDFReaderBase):
         i = _helpers.get_requested_time(self, outInfo)
         if self.need_to_read():
             self._read_up_front()
+        # Only read the requested update extent
+        info = outInfo.GetInformationObject(0)
+        ext = self.get_extent()
+        if info.Has(vtk.vtkStreamingDemandDrivenPipeline.UPDATE_EXTENT()):
+            ext = tuple(info.Get(vtk.vtkStreamingDemandDrivenPipeline.UPDATE_EXTENT()))
+        # Split the grid when each MPI rank asks for its own piece
+        core = None
+        piece, npieces, ghosts = self._get_update_piece(outInfo)
+        if npieces > 1 and ext == self.get_extent():
+            ext, core = self._get_piece_extent(piece, npieces, ghosts)
+        self.__update_extent = ext
         # Get the data which has already been loaded
         data = self._get_raw_data(idx=i)
         # Generate the data object
-        nx, ny, nz = self.get_extent(dim=True)
         dx, dy, dz = self.__spacing
         ox, oy, oz = self.__origin
-        output.SetDimensions(nx+1, ny+1, nz+1)
+        output.SetExtent(ext)
         output.SetSpacing(dx, dy, dz)
         output.SetOrigin(ox, oy, oz)
-        # Use table generater and convert because its easy:
-        table = vtk.vtkTable()
-        interface.data_frame_to_table(data, table)
-        # now get arrays from table and add to cell data of output
-        for i in range(table.GetNumberOfColumns()):
-            output.GetCellData().AddArray(table.GetColumn(i))
-        del(table)
+        self._add_arrays(output.GetCellData(), data)
+        if core is not None and core != ext:
+            name = vtk.vtkDataSetAttributes.GhostArrayName()
+            output.GetCellData().AddArray(self._to_vtk_array(self._get_ghost_cells(ext, core), name=name))
         return 1 # NOTE: ALWAYS return 1 on pipeline methods
 
 
@@ -222,6 +545,8 @@ class CMAQReader(netCDFReaderBase):
         info = outInfo.GetInformationObject(0)
         # Set WHOLE_EXTENT: This is absolutely necessary
         info.Set(vtk.vtkStreamingDemandDrivenPipeline.WHOLE_EXTENT(), ext, 6)
+        # Only the requested update extent is read in ``RequestData``
+        info.Set(vtk.vtkAlgorithm.CAN_PRODUCE_SUB_EXTENT(), 1)
         return 1
 
 
@@ -242,6 +567,290 @@ class CMAQReader(netCDFReaderBase):
 
 
 
+###############################################################################
+# CF Gridded Points
+
+# Units that mark longitude and latitude coordinates in the CF conventions
+_LON_UNITS = ('degrees_east', 'degree_east', 'degree_e', 'degrees_e', 'degreee', 'degreese')
+_LAT_UNITS = ('degrees_north', 'degree_north', 'degree_n', 'degrees_n', 'degreen', 'degreesn')
+_VERTICAL_NAMES = ('altitude', 'height', 'depth', 'air_pressure', 'model_level_number',
+                   'atmosphere_sigma_coordinate', 'atmosphere_hybrid_sigma_pressure_coordinate')
+
+
+def _get_axis(variable):
+    """Get the ``'X'``, ``'Y'``, ``'Z'``, or ``'T'`` axis of a CF coordinate
+    variable from its ``axis``, ``standard_name``, ``units``, or
+    ``positive`` attributes or ``None`` if it is not a coordinate.
+    """
+    attrs = variable.ncattrs()
+    def get(name):
+        return str(variable.getncattr(name)).lower() if name in attrs else ''
+    axis = get('axis').upper()
+    if axis in ('X', 'Y', 'Z', 'T'):
+        return axis
+    standard_name, units = get('standard_name'), get('units')
+    if standard_name in ('longitude', 'grid_longitude', 'projection_x_coordinate') or units in _LON_UNITS:
+        return 'X'
+    if standard_name in ('latitude', 'grid_latitude', 'projection_y_coordinate') or units in _LAT_UNITS:
+        return 'Y'
+    if 'positive' in attrs or standard_name in _VERTICAL_NAMES:
+        return 'Z'
+    return None
+
+
+def _get_uniform_spacing(values):
+    """Get the spacing of evenly spaced coordinates or ``None`` if they are
+    not evenly spaced. A single coordinate has a spacing of 1.
+    """
+    if len(values) < 2:
+        return 1.0
+    diff = np.diff(values)
+    if diff[0] == 0 or not np.allclose(diff, diff[0], rtol=1e-5, atol=0.0):
+        return None
+    return float(diff[0])
+
+
 class GriddedPointsReader(netCDFReaderBase):
-    """read gridded points from netCDF4 file"""
-    pass
+    """Reads time varying variables on a CF-convention grid from a netCDF
+    file. The grid is found from the coordinate variables of the dimensions
+    of the gridded variables and from the 2D longitude/latitude variables
+    named in their ``coordinates`` attributes. The output is a
+    ``vtkImageData`` when every axis is evenly spaced, a
+    ``vtkRectilinearGrid`` for 1D axes that are not, and a
+    ``vtkStructuredGrid`` for 2D (curvilinear) longitude/latitude. The
+    variables are point data at the grid coordinates. Axes whose 1D
+    coordinates decrease are flipped so the grid always increases.
+    """
+    __displayname__ = 'Gridded Points Reader'
+    __category__ = 'reader'
+    def __init__(self, **kwargs):
+        # The output type depends on the grid and is set in RequestDataObject
+        netCDFReaderBase.__init__(self, nOutputPorts=1, outputType='vtkImageData', **kwargs)
+        self.__dims = None
+        self.__shape = None
+        self.__grid_type = None
+        # The 1D ``(x, y, z)`` coordinates and the names of any 2D
+        # ``(lon, lat)`` coordinate variables
+        self.__coords = None
+        self.__curvilinear = None
+        # The index that flips the grid axes whose coordinates decrease
+        self.__flip = None
+        # The VTK geometry of the grid: built once and reused every timestep
+        self.__geometry = None
+
+    #### File reading methods ####
+
+    def _get_time_dimension(self, dataset):
+        """Get the name of the time dimension: the dimension of the CF time
+        coordinate or else the unlimited dimension.
+        """
+        variable = find_time_variable(dataset)
+        if variable is not None:
+            return variable.dimensions[0]
+        for name, dim in dataset.dimensions.items():
+            if dim.isunlimited():
+                return name
+        raise RuntimeError('Unable to find the time dimension of the dataset.')
+
+    def _get_time_length(self, dataset):
+        """Get the number of timesteps in an open file"""
+        return len(dataset.dimensions[self._get_time_dimension(dataset)])
+
+    @profile_stage('read_up_front')
+    def _read_up_front(self):
+        """This parses the grid and variable names of the loaded dataset and
+        chooses the output type. The gridded variables are those shaped
+        ``(time, [z,] y, x)`` on the same dimensions as the first of them.
+        Only the 1D coordinates are read here: the geometry is built when
+        data is first requested.
+        """
+        # Perform Read
+        self._get_file_contents()
+        dataset = self._dataSet
+        tdim = self._get_time_dimension(dataset)
+        self.__dims = None
+        self._keys = []
+        for name, variable in dataset.variables.items():
+            dims = tuple(variable.dimensions)
+            if len(dims) not in (3, 4) or dims[0] != tdim:
+                continue
+            if self.__dims is None:
+                self.__dims = dims[1:]
+            if dims[1:] == self.__dims:
+                self._keys.append(name)
+        if self.__dims is None:
+            raise RuntimeError('Unable to find any gridded variables in the dataset.')
+        self.__shape = tuple(len(dataset.dimensions[d]) for d in self.__dims)
+        self._describe_grid(dataset)
+
+        self._update_array_selection()
+
+        # Data is only read for the selected arrays in ``_get_raw_data``:
+        # either a timestep at a time when lazy or else a whole variable
+        self._data = None
+        # Mark as read
+        self.need_to_read(flag=False)
+        return 1
+
+    def _get_coordinates(self, dataset):
+        """Get the ``(x, y, z)`` 1D coordinates of the grid dimensions from
+        their coordinate variables (or the indices when a dimension has none)
+        and the names of any 2D ``(lon, lat)`` coordinates named in the
+        ``coordinates`` attributes of the gridded variables.
+        """
+        coords = []
+        for dim in reversed(self.__dims):
+            variable = dataset.variables.get(dim, None)
+            if variable is not None and variable.ndim == 1:
+                coords.append(np.asarray(self._fill_masked(variable[:]), dtype=np.float64))
+            else:
+                coords.append(np.arange(len(dataset.dimensions[dim]), dtype=np.float64))
+        if len(coords) < 3:
+            coords.append(np.zeros(1))
+        # Look for curvilinear longitude/latitude
+        names = set()
+        for k in self._keys:
+            variable = dataset.variables[k]
+            if 'coordinates' in variable.ncattrs():
+                names.update(str(variable.getncattr('coordinates')).split())
+        aux = dict()
+        for name in sorted(names):
+            variable = dataset.variables.get(name, None)
+            if variable is None or tuple(variable.dimensions) != self.__dims[-2:]:
+                continue
+            axis = _get_axis(variable)
+            if axis in ('X', 'Y') and axis not in aux:
+                aux[axis] = name
+        if 'X' in aux and 'Y' in aux:
+            return coords, (aux['X'], aux['Y'])
+        return coords, None
+
+    def _describe_grid(self, dataset):
+        """Choose the output type for the grid from its coordinates"""
+        self.__coords, self.__curvilinear = self._get_coordinates(dataset)
+        self.__geometry = None
+        self.__flip = None
+        if self.__curvilinear is None:
+            # Flip the axes whose coordinates decrease (e.g. latitude stored
+            # north to south) so the grid has positive spacing
+            decreasing = [len(c) > 1 and c[-1] < c[0] for c in self.__coords]
+            if any(decreasing):
+                self.__coords = [c[::-1].copy() if d else c for c, d in zip(self.__coords, decreasing)]
+                flip = [slice(None, None, -1) if d else slice(None) for d in decreasing]
+                self.__flip = (Ellipsis,) + tuple(reversed(flip))[-len(self.__dims):]
+        if self.__curvilinear is not None:
+            self.__grid_type = 'vtkStructuredGrid'
+        elif all(_get_uniform_spacing(c) is not None for c in self.__coords):
+            self.__grid_type = 'vtkImageData'
+        else:
+            self.__grid_type = 'vtkRectilinearGrid'
+        return self.__grid_type
+
+    def _get_geometry(self):
+        """Get the geometry of the grid, building it the first time: the
+        ``(origin, spacing)`` of an image, the VTK coordinate arrays of a
+        rectilinear grid, or the ``vtkPoints`` of a structured grid.
+        """
+        if self.__geometry is not None:
+            return self.__geometry
+        x, y, z = self.__coords
+        if self.__grid_type == 'vtkStructuredGrid':
+            with self._use_file(0):
+                lon, lat = [np.asarray(self._read_variable(name), dtype=np.float64)
+                            for name in self.__curvilinear]
+            points = np.empty((len(z), len(y), len(x), 3))
+            points[..., 0] = lon
+            points[..., 1] = lat
+            points[..., 2] = z[:, None, None]
+            pts = vtk.vtkPoints()
+            pts.SetData(self._to_vtk_array(points.reshape((-1, 3))))
+            self.__geometry = pts
+        elif self.__grid_type == 'vtkImageData':
+            spacing = tuple(_get_uniform_spacing(c) for c in self.__coords)
+            self.__geometry = ((x[0], y[0], z[0]), spacing)
+        else:
+            self.__geometry = tuple(self._to_vtk_array(c) for c in self.__coords)
+        return self.__geometry
+
+    def _read_block(self, name, start, stop, region=None, step=1):
+        """Reads every ``step``-th timestep of ``[start, stop)`` of a variable
+        as a contiguous 2D array where the first axis is time and the second
+        is the flattened grid (x varies fastest) so each timestep is a view
+        that can be handed to VTK without a copy.
+        """
+        key = self._get_key(name, slice(start, stop, step), region)
+        arr = self._read_variable(name, key)
+        if self.__flip is not None:
+            arr = np.ascontiguousarray(arr[self.__flip])
+        return arr.reshape((len(range(start, stop, step)), -1))
+
+    @profile_stage('get_raw_data')
+    def _get_raw_data(self, idx=0):
+        """Get an ordered dictionary of the contiguous, flattened attribute
+        arrays for the selected variables at the timestep.
+        """
+        return self._get_arrays(idx)
+
+    def get_extent(self):
+        """Get the point extent of the grid"""
+        if self.__shape is None:
+            self._read_up_front()
+        shape = (1,) * (3 - len(self.__shape)) + self.__shape
+        nz, ny, nx = shape
+        return (0,nx-1, 0,ny-1, 0,nz-1)
+
+    def get_grid_type(self):
+        """Get the name of the VTK class that the grid is output as"""
+        if self.need_to_read():
+            self._read_up_front()
+        return self.__grid_type
+
+    #### Algorithm Methods ####
+
+    def RequestDataObject(self, request, inInfo, outInfo):
+        """This lets the pipeline know that the output data type depends on
+        the type of grid in the file.
+        """
+        self.OutputType = self.get_grid_type()
+        # The executive creates the output from the type on the output port
+        self.FillOutputPortInformation(0, self.GetOutputPortInformation(0))
+        return 1 # NOTE: ALWAYS return 1 on pipeline methods
+
+    @profile_stage('RequestData')
+    def RequestData(self, request, inInfo, outInfo):
+        """Used by pipeline to get data for current timestep and populate the
+        output data object. The grid geometry is reused across timesteps so
+        only the selected variables are read.
+        """
+        # Get output:
+        output = self.GetOutputData(outInfo, 0)
+        # Get requested time index
+        i = _helpers.get_requested_time(self, outInfo)
+        if self.need_to_read():
+            self._read_up_front()
+        data = self._get_raw_data(idx=i)
+        # Generate the data object
+        output.SetExtent(self.get_extent())
+        geometry = self._get_geometry()
+        if self.__grid_type == 'vtkImageData':
+            origin, spacing = geometry
+            output.SetOrigin(origin)
+            output.SetSpacing(spacing)
+        elif self.__grid_type == 'vtkRectilinearGrid':
+            x, y, z = geometry
+            output.SetXCoordinates(x)
+            output.SetYCoordinates(y)
+            output.SetZCoordinates(z)
+        else:
+            output.SetPoints(geometry)
+        self._add_arrays(output.GetPointData(), data)
+        return 1 # NOTE: ALWAYS return 1 on pipeline methods
+
+    def RequestInformation(self, request, inInfo, outInfo):
+        """Used by pipeline to set the timesteps and grid extent.
+        """
+        netCDFReaderBase.RequestInformation(self, request, inInfo, outInfo)
+        info = outInfo.GetInformationObject(0)
+        # Set WHOLE_EXTENT: This is absolutely necessary
+        info.Set(vtk.vtkStreamingDemandDrivenPipeline.WHOLE_EXTENT(), self.get_extent(), 6)
+        return 1 # NOTE: ALWAYS return 1 on pipeline methods
@@ -0,0 +1,165 @@
+"""This module plans chunk aligned reads of netCDF4/HDF5 variables."""
+
+__all__ = [
+    'ReadPlanner',
+]
+
+__displayname__ = 'Read Planning'
+
+import numpy as np
+
+
+def _next_prime(n):
+    """Get the smallest prime number greater than or equal to ``n``"""
+    n = max(int(n), 2)
+    while True:
+        if all(n % d for d in range(2, int(n**0.5) + 1)):
+            return n
+        n += 1
+
+
+def _key_bounds(shape, key):
+    """Get the ``(start, stop)`` index bounds of each dimension covered by an
+    index into an array of the given shape. The key may be an integer, a slice,
+    or a tuple of those and may be shorter than the number of dimensions.
+    """
+    if not isinstance(key, tuple):
+        key = (key,)
+    if any(k is Ellipsis for k in key):
+        key = ()
+    bounds = []
+    for i, n in enumerate(shape):
+        k = key[i] if i < len(key) else slice(None)
+        if isinstance(k, slice):
+            start, stop, _ = k.indices(n)
+            bounds.append((start, max(start, stop)))
+        else:
+            k = int(k) % n if n > 0 else 0
+            bounds.append((k, k + 1))
+    return bounds
+
+
+class ReadPlanner(object):
+    """Plans reads of a single netCDF4 variable or ``h5py`` dataset around its
+    chunk layout.
+    Reading one timestep at a time from a file that is chunked along time
+    decompresses the same chunks over and over: the planner instead reads the
+    whole chunk aligned block of timesteps at once so each chunk is read and
+    decompressed a single time. It also sizes the variable's HDF5 chunk cache
+    so that every chunk touched by a read fits in it.
+
+    Args:
+        variable (netCDF4.Variable or h5py.Dataset): the variable to plan
+            reads of
+        time_axis (int): the axis of the variable that is time
+        max_cache_bytes (int): the largest HDF5 chunk cache to allow
+    """
+    __displayname__ = 'Read Planner'
+    __category__ = 'base'
+    def __init__(self, variable, time_axis=0, max_cache_bytes=64*1024**2):
+        self._variable = variable
+        self.shape = tuple(variable.shape)
+        self.dimensions = tuple(getattr(variable, 'dimensions', ()))
+        self.time_axis = time_axis
+        try:
+            self.itemsize = np.dtype(variable.dtype).itemsize
+        except TypeError:
+            self.itemsize = 8 # variable length types
+        if hasattr(variable, 'chunking'):
+            chunking = variable.chunking()
+            filters = variable.filters() or dict()
+        else:
+            # An ``h5py.Dataset``
+            chunking = variable.chunks
+            filters = {'shuffle': variable.shuffle, 'fletcher32': variable.fletcher32}
+            if variable.compression is not None:
+                filters[variable.compression] = True
+        if chunking is None or chunking == 'contiguous':
+            self.chunks = None
+        else:
+            self.chunks = tuple(chunking)
+        self.filters = filters
+        self._max_cache_bytes = int(max_cache_bytes)
+        self._cache_settings = None
+
+    @property
+    def chunked(self):
+        """``True`` if the variable is stored in chunks"""
+        return self.chunks is not None
+
+    @property
+    def compressed(self):
+        """``True`` if the variable's chunks pass through any filter (e.g.
+        zlib, shuffle, or checksums) when they are read"""
+        return any(v for k, v in self.filters.items() if k != 'complevel')
+
+    def get_nbytes(self, key):
+        """Get the number of bytes of the hyperslab selected by the key"""
+        bounds = _key_bounds(self.shape, key)
+        return int(np.prod([b - a for a, b in bounds])) * self.itemsize
+
+    def get_chunks_touched(self, key):
+        """Get the number of chunks that intersect the hyperslab selected by
+        the key and the number of bytes of each (uncompressed) chunk.
+        """
+        if not self.chunked:
+            return 0, 0
+        count = 1
+        for (a, b), c in zip(_key_bounds(self.shape, key), self.chunks):
+            if b > a:
+                count *= (b - 1) // c - a // c + 1
+            else:
+                count = 0
+        return count, int(np.prod(self.chunks)) * self.itemsize
+
+    def get_time_block(self, idx, key, max_bytes):
+        """Plan the block of timesteps to read along with timestep ``idx``.
+        When the time axis is chunked, this is the chunk aligned block holding
+        ``idx`` so that the chunks are decompressed once for all of those
+        timesteps. The block is shrunk to start at ``idx`` if it would be larger
+        than ``max_bytes``.
+
+        Args:
+            idx (int): the requested timestep
+            key: the index of the hyperslab of the timestep
+            max_bytes (int): the largest block to read
+
+        Return:
+            tuple(int): the ``[start, stop)`` range of timesteps to read
+        """
+        ntime = self.shape[self.time_axis]
+        if not self.chunked or self.chunks[self.time_axis] <= 1:
+            return idx, idx + 1
+        size = self.chunks[self.time_axis]
+        start = (idx // size) * size
+        stop = min(start + size, ntime)
+        limit = max(1, int(max_bytes) // max(self.get_nbytes(key), 1))
+        if stop - start > limit:
+            start, stop = idx, min(idx + limit, stop)
+        return start, stop
+
+    def tune(self, key):
+        """Size the variable's HDF5 chunk cache for reading the hyperslab
+        selected by the key. The cache holds every chunk the read touches (up
+        to the byte limit). Chunks that are only partially read are kept in
+        preference to fully read chunks because neighbouring reads will want
+        them. ``h5py`` datasets share the chunk cache set when the file is
+        opened so this does nothing for them.
+        """
+        if not hasattr(self._variable, 'set_var_chunk_cache'):
+            return
+        count, chunk_bytes = self.get_chunks_touched(key)
+        if count == 0:
+            return
+        size = min(count * chunk_bytes, self._max_cache_bytes)
+        # HDF5 suggests a prime number of hash slots well above the number
+        # of chunks that fit in the cache
+        nelems = _next_prime(max(521, 10 * (size // max(chunk_bytes, 1))))
+        partial = any((a % c) or (b % c and b != n)
+                      for (a, b), c, n in zip(_key_bounds(self.shape, key), self.chunks, self.shape))
+        preemption = 0.0 if partial else 1.0
+        settings = (size, nelems, preemption)
+        if settings != self._cache_settings:
+            self._variable.set_var_chunk_cache(size=size, nelems=nelems, preemption=preemption)
+            self._cache_settings = settings
+        return
@@ -0,0 +1,225 @@
+"""This module records how long each stage of a reader takes and how much
+data it reads and allocates so slow frames can be profiled in production
+sessions without attaching a profiler. Profiling is off unless the
+``PVGEOHDF_PROFILE`` environment variable is set or a reader is given
+``profile=True``:
+
+- ``PVGEOHDF_PROFILE=1`` records the stages and logs each of them at the
+  ``DEBUG`` level of the ``pvgeohdf.profile`` logger.
+- ``PVGEOHDF_PROFILE=/path/to/trace.json`` (or ``.csv``) also writes the
+  trace to that file when the process exits.
+- ``PVGEOHDF_PROFILE_MEMORY=1`` also traces the bytes allocated by each
+  stage with ``tracemalloc`` (this slows everything down).
+"""
+
+__all__ = [
+    'StageProfiler',
+    'profile_stage',
+]
+
+__displayname__ = 'Profiling'
+
+import atexit
+import collections
+import contextlib
+import csv
+import functools
+import json
+import logging
+import os
+import threading
+import timeit
+import weakref
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None # Python 2
+
+
+_logger = logging.getLogger('pvgeohdf.profile')
+
+# The fields of a recorded stage
+StageRecord = collections.namedtuple('StageRecord', ['stage', 'thread', 'start', 'wall',
+                                                     'bytes_read', 'bytes_allocated'])
+
+
+class _NullStage(object):
+    """The stage of a reader that is not being profiled: it does nothing"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+_null_stage = _NullStage()
+
+
+def _write_at_exit(ref, filename):
+    """Write the trace of a profiler that is still alive"""
+    profiler = ref()
+    if profiler is not None and len(profiler.records):
+        profiler.write(filename)
+
+
+def profile_stage(name):
+    """Decorate a reader method so each call is recorded as a stage of the
+    reader's profiler (if it has one).
+
+    Args:
+        name (str): the name of the stage
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self._stage(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class StageProfiler(object):
+    """Records the wall time, bytes read, and (optionally) bytes allocated of
+    each call of the named stages of a reader. Stages nest: a stage is named
+    by the path of the stages it was entered in (e.g.
+    ``RequestData/get_raw_data/read``) and the bytes read in a stage count
+    towards every stage it is nested in. Each thread has its own stack of
+    stages so reads on the prefetch thread are recorded apart from the
+    pipeline.
+
+    Args:
+        max_records (int): the most records to keep (the oldest are dropped)
+        trace_memory (bool): trace allocations with ``tracemalloc``
+        filename (str): a ``.json`` or ``.csv`` file to write the trace to
+            when the process exits
+    """
+    __displayname__ = 'Stage Profiler'
+    __category__ = 'base'
+    def __init__(self, max_records=100000, trace_memory=False, filename=None):
+        self.records = collections.deque(maxlen=max_records)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._trace_memory = trace_memory and tracemalloc is not None
+        if self._trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if filename:
+            atexit.register(_write_at_exit, weakref.ref(self), filename)
+
+    @classmethod
+    def from_environment(cls):
+        """Make a profiler as set by the ``PVGEOHDF_PROFILE`` environment
+        variable or return ``None`` if profiling is off.
+        """
+        value = os.environ.get('PVGEOHDF_PROFILE', '').strip()
+        if value.lower() in ('', '0', 'false', 'off'):
+            return None
+        filename = None
+        if value.lower().endswith(('.json', '.csv')):
+            filename = value
+        trace_memory = os.environ.get('PVGEOHDF_PROFILE_MEMORY', '') not in ('', '0')
+        return cls(trace_memory=trace_memory, filename=filename)
+
+    def _get_stack(self):
+        """Get the stack of ``[name, bytes_read]`` of the current thread"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Record the body of a ``with`` block as a stage. Entering a stage of
+        the same name as the current one (e.g. an override calling its base
+        method) is recorded once.
+        """
+        stack = self._get_stack()
+        if len(stack) and stack[-1][0] == name:
+            yield
+            return
+        path = '/'.join([s[0] for s in stack] + [name])
+        entry = [name, 0]
+        stack.append(entry)
+        mem = tracemalloc.get_traced_memory()[0] if self._trace_memory else None
+        start = timeit.default_timer()
+        try:
+            yield
+        finally:
+            wall = timeit.default_timer() - start
+            allocated = None
+            if mem is not None:
+                allocated = tracemalloc.get_traced_memory()[0] - mem
+            stack.pop()
+            record = StageRecord(path, threading.current_thread().name, start, wall, entry[1], allocated)
+            with self._lock:
+                self.records.append(record)
+            _logger.debug('%s: %.6f s, %d bytes read, %s bytes allocated',
+                          path, wall, entry[1], allocated)
+
+    def add_bytes_read(self, nbytes):
+        """Count bytes read from disk towards the current stages of this
+        thread
+        """
+        for entry in self._get_stack():
+            entry[1] += int(nbytes)
+        return
+
+    def clear(self):
+        """Drop every record"""
+        with self._lock:
+            self.records.clear()
+        return
+
+    def summary(self):
+        """Get the number of calls and the total/mean/max wall time and total
+        bytes read and allocated of each stage.
+
+        Return:
+            collections.OrderedDict: the statistics of each stage by name
+        """
+        stats = collections.OrderedDict()
+        with self._lock:
+            records = list(self.records)
+        for r in records:
+            s = stats.setdefault(r.stage, dict(calls=0, total=0.0, max=0.0,
+                                               bytes_read=0, bytes_allocated=0))
+            s['calls'] += 1
+            s['total'] += r.wall
+            s['max'] = max(s['max'], r.wall)
+            s['bytes_read'] += r.bytes_read
+            s['bytes_allocated'] += r.bytes_allocated or 0
+        for s in stats.values():
+            s['mean'] = s['total'] / s['calls']
+        return stats
+
+    def write(self, filename):
+        """Write every record to a ``.json`` or ``.csv`` file. JSON traces are
+        in the Chrome trace event format so they can be viewed in
+        ``chrome://tracing`` or Perfetto.
+        """
+        with self._lock:
+            records = list(self.records)
+        if filename.lower().endswith('.csv'):
+            with open(filename, 'w') as f:
+                writer = csv.writer(f)
+                writer.writerow(StageRecord._fields)
+                for r in records:
+                    writer.writerow(r)
+            return filename
+        events = []
+        tids = dict()
+        pid = os.getpid()
+        for r in records:
+            if r.thread not in tids:
+                # Name the thread in the viewer
+                tids[r.thread] = len(tids)
+                events.append(dict(name='thread_name', ph='M', pid=pid, tid=tids[r.thread],
+                                   args=dict(name=r.thread)))
+            args = dict(bytes_read=r.bytes_read)
+            if r.bytes_allocated is not None:
+                args['bytes_allocated'] = r.bytes_allocated
+            events.append(dict(name=r.stage.rsplit('/', 1)[-1], cat=r.stage, ph='X',
+                               ts=r.start*1e6, dur=r.wall*1e6, pid=pid,
+                               tid=tids[r.thread], args=args))
+        with open(filename, 'w') as f:
+            json.dump(dict(traceEvents=events), f)
+        return filename
@@ -0,0 +1,98 @@
+"""This module decodes the time values of netCDF files so that timesteps
+line up with other sources in ParaView. All times are decoded to days since
+1970-01-01 (``TIME_UNITS``)."""
+
+__all__ = [
+    'TIME_UNITS',
+    'decode_cf_time',
+    'decode_tflag',
+    'find_time_variable',
+]
+
+__displayname__ = 'Time Decoding'
+
+import warnings
+
+import numpy as np
+import netCDF4
+
+
+TIME_UNITS = 'days since 1970-01-01 00:00:00'
+
+
+def decode_cf_time(values, units, calendar='standard'):
+    """Decode CF-convention time values (e.g. ``hours since 2016-07-01``) to
+    days since 1970-01-01 in the same calendar. Both units are linear in
+    the calendar so this only converts two values through ``cftime`` and
+    scales the rest with NumPy.
+
+    Args:
+        values (np.ndarray): the time values
+        units (str): the CF ``units`` attribute of the time variable
+        calendar (str): the CF ``calendar`` attribute of the time variable
+
+    Return:
+        np.ndarray: float64 days since 1970-01-01 or ``None`` if ``cftime``
+        cannot decode the units (e.g. ``months since`` in the standard
+        calendar)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    try:
+        dates = netCDF4.num2date([0.0, 1.0], units, calendar=calendar)
+        d0, d1 = netCDF4.date2num(dates, TIME_UNITS, calendar=calendar)
+    except (ValueError, TypeError) as err:
+        warnings.warn('Unable to decode the time units `%s`: using the timestep indices instead (%s).'
+                      % (units, err))
+        return None
+    return d0 + values * (d1 - d0)
+
+
+def decode_tflag(tflag):
+    """Decode a CMAQ/IOAPI ``TFLAG`` variable of ``[YYYYDDD, HHMMSS]``
+    integer pairs to days since 1970-01-01. Only the flags of the first
+    variable are used as all variables share the same timesteps.
+
+    Args:
+        tflag (np.ndarray): the ``(TSTEP, VAR, 2)`` or ``(TSTEP, 2)`` flags
+
+    Return:
+        np.ndarray: float64 days since 1970-01-01 or ``None`` if any
+        timestep has no date
+    """
+    tflag = np.ma.getdata(tflag)
+    if tflag.ndim == 3:
+        tflag = tflag[:, 0, :]
+    date = tflag[:, 0].astype(np.int64)
+    time = tflag[:, 1].astype(np.int64)
+    if len(date) == 0 or np.any(date <= 0):
+        return None
+    year, doy = date // 1000, date % 1000
+    # Days from the epoch to January 1st of each year
+    jan1 = (year - 1970).astype('datetime64[Y]').astype('datetime64[D]').astype(np.int64)
+    seconds = (time // 10000) * 3600 + (time // 100 % 100) * 60 + time % 100
+    return jan1 + (doy - 1) + seconds / 86400.0
+
+
+def find_time_variable(dataset, length=None):
+    """Find the CF-convention time coordinate variable of a dataset: a 1D
+    variable with ``units`` of the form ``<unit> since <date>`` that is named
+    ``time`` or has a ``T`` axis or ``time`` standard name.
+
+    Args:
+        dataset (netCDF4.Dataset): the open dataset
+        length (int): only match time variables with this many values
+
+    Return:
+        netCDF4.Variable: the time variable or ``None``
+    """
+    for name, variable in dataset.variables.items():
+        if variable.ndim != 1 or (length is not None and variable.shape[0] != length):
+            continue
+        attrs = variable.ncattrs()
+        if 'units' not in attrs or ' since ' not in str(variable.getncattr('units')):
+            continue
+        if name.lower() == 'time' or \
+                ('axis' in attrs and variable.getncattr('axis') == 'T') or \
+                ('standard_name' in attrs and variable.getncattr('standard_name') == 'time'):
+            return variable
+    return None
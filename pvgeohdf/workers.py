@@ -0,0 +1,192 @@
+"""This module reads timesteps in worker processes. netCDF4/HDF5 are not
+thread safe and hold the GIL while reading so threads cannot read in
+parallel: each worker process opens the files on its own and hands the
+arrays it reads back through memory backed files that the reader maps
+without a copy."""
+
+__all__ = [
+    'ReadWorkerPool',
+]
+
+__displayname__ = 'Worker Processes'
+
+import collections
+import os
+import tempfile
+import threading
+import uuid
+
+import numpy as np
+
+try:
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+except ImportError:
+    ProcessPoolExecutor = None # Python 2
+
+# The reader and transfer directory of a worker process
+_reader = None
+_transfer_dir = None
+
+
+def _get_transfer_dir():
+    """Get a directory for handing arrays between processes. ``/dev/shm`` is
+    backed by memory so the arrays never touch the disk.
+    """
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return '/dev/shm'
+    return tempfile.gettempdir()
+
+
+def _init_worker(reader, transfer_dir):
+    """Set up a worker process forked from the process owning the reader"""
+    global _reader, _transfer_dir
+    reader._detach_files()
+    _reader = reader
+    _transfer_dir = transfer_dir
+
+
+def _share(arr):
+    """Save an array for the reader process to map. Empty arrays are
+    returned as they are.
+    """
+    if arr.size == 0:
+        return arr
+    path = os.path.join(_transfer_dir, 'pvgeohdf-%s.npy' % uuid.uuid4().hex)
+    np.save(path, np.ascontiguousarray(arr), allow_pickle=False)
+    return path
+
+
+def _attach(result):
+    """Map an array saved by a worker process. The file is removed right
+    away: the mapping keeps the memory alive for as long as the array is.
+    """
+    if isinstance(result, np.ndarray):
+        return result
+    try:
+        # Copy on write so the array is writable without touching the file
+        return np.load(result, mmap_mode='c', allow_pickle=False)
+    finally:
+        os.remove(result)
+
+
+def _discard(future):
+    """Remove the file of a result that will never be used"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    result = future.result()
+    if not isinstance(result, np.ndarray) and os.path.exists(result):
+        os.remove(result)
+
+
+def _header_task(filename):
+    """Get the number of timesteps and the time values of a file"""
+    dataset = _reader._open_dataset(filename)
+    try:
+        length = _reader._get_time_length(dataset)
+        return length, _reader._get_time_values(dataset, length)
+    finally:
+        dataset.close()
+
+
+def _read_task(key):
+    """Read an ``(idx, name, region)`` key of a single timestep"""
+    idx, name, region = key
+    arr = _reader._load_from_disk(key)
+    if arr is None:
+        arr = _reader._read_array(name, idx, region=region)
+        _reader._save_to_disk(key, arr)
+    return _share(arr)
+
+
+def _block_task(name, fi, start, stop, region, step):
+    """Read a block of timesteps of an array from a single file"""
+    with _reader._use_file(fi):
+        return _share(_reader._read_block(name, start, stop, region=region, step=step))
+
+
+class ReadWorkerPool(object):
+    """A pool of worker processes forked from the process owning a reader.
+    The workers open the reader's files on their own so reads happen in
+    parallel. Results are handed back through memory backed files that are
+    mapped rather than copied.
+
+    Args:
+        reader (netCDFReaderBase): the reader to read with
+        processes (int): the number of worker processes
+    """
+    __displayname__ = 'Read Worker Pool'
+    __category__ = 'base'
+    def __init__(self, reader, processes):
+        if ProcessPoolExecutor is None:
+            raise RuntimeError('Worker processes need Python 3.')
+        # Workers must be forked: the reader is not picklable
+        context = multiprocessing.get_context('fork')
+        self._processes = max(1, int(processes))
+        self._executor = ProcessPoolExecutor(max_workers=self._processes, mp_context=context,
+                                             initializer=_init_worker,
+                                             initargs=(reader, _get_transfer_dir()))
+        self._futures = collections.OrderedDict()
+        self._lock = threading.Lock()
+        # The most queued reads to keep before dropping the oldest
+        self._max_pending = 8 * self._processes
+
+    def submit(self, key):
+        """Start reading an ``(idx, name, region)`` key in a worker if it is
+        not already being read.
+        """
+        with self._lock:
+            if key in self._futures:
+                return
+            self._futures[key] = self._executor.submit(_read_task, key)
+            while len(self._futures) > self._max_pending:
+                _, future = self._futures.popitem(last=False)
+                if not future.cancel():
+                    future.add_done_callback(_discard)
+        return
+
+    def result(self, key):
+        """Get the array of a key, waiting only on the read of that key"""
+        with self._lock:
+            future = self._futures.pop(key, None)
+            if future is None:
+                future = self._executor.submit(_read_task, key)
+        return _attach(future.result())
+
+    def map_headers(self, filenames):
+        """Get the ``(length, time_values)`` of each file in parallel"""
+        return list(self._executor.map(_header_task, filenames))
+
+    def read_blocks(self, name, ranges, region=None, step=1):
+        """Read blocks of timesteps of an array from several files in
+        parallel. Yields the array of each ``(file_index, start, stop)`` range
+        in order.
+        """
+        futures = [self._executor.submit(_block_task, name, fi, start, stop, region, step)
+                   for fi, start, stop in ranges]
+        used = 0
+        try:
+            for future in futures:
+                arr = _attach(future.result())
+                used += 1
+                yield arr
+        finally:
+            # Drop the reads that were not used (e.g. after an error)
+            for future in futures[used:]:
+                if not future.cancel():
+                    future.add_done_callback(_discard)
+
+    def cancel(self):
+        """Drop every queued read"""
+        with self._lock:
+            while len(self._futures) > 0:
+                _, future = self._futures.popitem(last=False)
+                if not future.cancel():
+                    future.add_done_callback(_discard)
+        return
+
+    def shutdown(self):
+        """Drop every queued read and stop the worker processes"""
+        self.cancel()
+        self._executor.shutdown(wait=False)
+        return
@@ -31,6 +31,10 @@ if os.name == 'nt' and (int(sys.version[0]) < 3 or '64' not in platform.architec
 else:
     install_requires.append(['vtk>=8.1'])
 
+# Optional dependencies
+extras_require={
+    'hdf5': ['h5py'],
+}
 
 
 setuptools.setup(
@@ -42,8 +46,9 @@ setuptools.setup(
     long_description=long_description,
     long_description_content_type="text/x-rst",
     url="https://github.com/OpenGeoVis/PVGeo-HDF5",
-    packages=setuptools.find_packages(),
+    packages=setuptools.find_packages(exclude=['tests', 'tests.*']),
     install_requires=install_requires,
+    extras_require=extras_require,
     classifiers=(
         "Programming Language :: Python",
         "License :: OSI Approved :: BSD License",
@@ -0,0 +1,83 @@
+"""Regression tests of the peak memory of reading a whole run. Reading every
+timestep of a variable up front must allocate about as much as the variable
+holds and not a second copy of it.
+"""
+
+import gc
+import tracemalloc
+import weakref
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('netCDF4')
+pytest.importorskip('vtk')
+
+from benchmarks.generators import write_cmaq
+from pvgeohdf import CMAQReader
+
+
+NUM_TIMES = 24
+GRID = (10, 60, 80)
+SPECIES = ('O3', 'NO', 'NO2', 'CO')
+
+# The most the peak may exceed the size of the variable by
+TOLERANCE = 1.25
+
+
+def _write_series(tmpdir, num_files):
+    """Write the run split along time across ``num_files`` files"""
+    per_file = NUM_TIMES // num_files
+    return [write_cmaq(str(tmpdir.join('cmaq_%d.nc' % i)), num_times=per_file, grid=GRID,
+                       species=SPECIES, start=i * per_file)
+            for i in range(num_files)]
+
+
+def _get_peak_read(filenames, variable):
+    """Get the peak bytes allocated while reading every timestep of a
+    variable up front and the number of bytes the variable holds
+    """
+    reader = CMAQReader(lazy=False, prefetch=0, use_memmap=False)
+    # Read a few timesteps at a time when reading into the final array
+    reader._block_bytes = 256*1024
+    for filename in filenames:
+        reader.AddFileName(filename)
+    times = reader.get_time_step_values()
+    selection = reader.get_data_array_selection()
+    selection.DisableAllArrays()
+    selection.EnableArray(variable)
+    tracemalloc.start()
+    try:
+        reader.UpdateTimeStep(times[0])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    nbytes = NUM_TIMES * int(np.prod(GRID)) * np.dtype(np.float32).itemsize
+    return peak, nbytes
+
+
+@pytest.mark.parametrize('num_files', [1, 2, 3])
+def test_eager_read_peak_memory(tmpdir, num_files):
+    """Reading a variable in full holds one copy of it: the blocks of each
+    file are read straight into the final array rather than stacked.
+    """
+    filenames = _write_series(tmpdir, num_files)
+    peak, nbytes = _get_peak_read(filenames, 'O3')
+    assert peak >= nbytes
+    assert peak < TOLERANCE * nbytes, 'peak of %.2fx the variable' % (peak / float(nbytes))
+
+
+def test_reader_is_freed(tmpdir):
+    """A reader that has opened and prefetched from a file is freed with
+    everything it read once it is deleted
+    """
+    filename = write_cmaq(str(tmpdir.join('cmaq.nc')), num_times=4, grid=GRID, species=SPECIES)
+    reader = CMAQReader(lazy=True, prefetch=2)
+    reader.AddFileName(filename)
+    times = reader.get_time_step_values()
+    reader.UpdateTimeStep(times[0])
+    reader._cache.wait()
+    ref = weakref.ref(reader)
+    del reader
+    gc.collect()
+    assert ref() is None